@@ -0,0 +1,59 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.urls import URLPattern
+
+from foodgram.async_db import database_sync_to_async
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Маршруты api.urls, которые под ASGI обслуживаются асинхронно.
+ASYNC_ROUTES = (
+    'recipes-list',
+    'recipes-detail',
+    'tags-list',
+    'tags-detail',
+    'ingredients-list',
+    'ingredients-detail',
+)
+
+
+def async_read_view(view):
+    """Асинхронное представление для чтения на основе представления DRF.
+
+    Чтение вместе с отрисовкой ответа выполняется в пуле потоков:
+    под ASGI запросы не занимают процесс на время ожидания базы
+    данных и не выстраиваются в очередь к единственному потоку
+    синхронных представлений. Изменяющие запросы выполняются, как
+    и прежде, в потоке синхронного кода.
+    """
+
+    def read(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    read = database_sync_to_async(read)
+    write = sync_to_async(view)
+
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await read(request, *args, **kwargs)
+        return await write(request, *args, **kwargs)
+
+    return async_view
+
+
+def async_routes(patterns):
+    """Маршруты с асинхронными представлениями для ASYNC_ROUTES."""
+    return [
+        URLPattern(
+            pattern.pattern,
+            async_read_view(pattern.callback),
+            pattern.default_args,
+            pattern.name
+        )
+        if getattr(pattern, 'name', None) in ASYNC_ROUTES else pattern
+        for pattern in patterns
+    ]
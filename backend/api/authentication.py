@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+TOKEN_CACHE = 'tokens'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def token_cache_key(key):
+    return f'auth_token:{key}'
+
+
+def forget_tokens(keys):
+    """Удаление токенов из кэша сразу и после фиксации транзакции.
+
+    Повторное удаление убирает токен, который параллельный запрос мог
+    прочитать из базы данных до фиксации и снова сохранить в кэше.
+    """
+    cache_keys = [token_cache_key(key) for key in keys]
+    if cache_keys:
+        cache = caches[TOKEN_CACHE]
+        cache.delete_many(cache_keys)
+        transaction.on_commit(lambda: cache.delete_many(cache_keys))
+
+
+def forget_user_tokens(user_id):
+    """Удаление из кэша токенов пользователя."""
+    forget_tokens(
+        Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Авторизация по токену с кэшированием токена и пользователя.
+
+    Токен вместе с пользователем хранится в кэше tokens с ограниченным
+    временем жизни, поэтому чтение с авторизацией обходится без запроса
+    к базе данных. Записи удаляются при удалении токена (выход), смене
+    пароля и любом сохранении или удалении пользователя.
+
+    Изменяющие запросы всегда берут пользователя из базы данных: иначе
+    сохранение устаревшего объекта затёрло бы его счётчики. Кэш
+    используется только с общим бэкендом (CACHE_IS_SHARED): локальный
+    кэш очищается лишь в том процессе, где произошло изменение, и
+    отозванный токен оставался бы действительным в остальных.
+    """
+
+    def authenticate(self, request):
+        self.method = request.method
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        if not settings.CACHE_IS_SHARED:
+            return super().authenticate_credentials(key)
+        cache = caches[TOKEN_CACHE]
+        cache_key = token_cache_key(key)
+        if self.method in SAFE_METHODS:
+            token = cache.get(cache_key)
+            if token is not None:
+                return token.user, token
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key, token)
+        return user, token
@@ -0,0 +1,175 @@
+import gc
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from api.metrics import RequestMetrics
+from recipes.models import Recipe, Tag
+from recipes.synthetic import EMAIL_DOMAIN
+
+User = get_user_model()
+
+BUDGET_HEADROOM = 2
+MIN_LATENCY_BUDGET_MS = 10
+
+# Название, имя маршрута api.urls, строка запроса, нужна ли авторизация.
+ENDPOINTS = (
+    ('recipes', 'api:recipes-list', '', False),
+    ('recipes_auth', 'api:recipes-list', '', True),
+    ('recipes_cursor', 'api:recipes-list', 'cursor=', True),
+    ('recipes_search', 'api:recipes-list', 'search={word}', False),
+    ('recipes_tags_all', 'api:recipes-list',
+     'tags={tag}&tags={other_tag}&tags_match=all', False),
+    ('recipes_ingredients', 'api:recipes-list',
+     'ingredients={ingredients}&max_missing=2', False),
+    ('recipe_detail', 'api:recipes-detail', '', True),
+    ('tag_facets', 'api:recipes-tag-facets', '', False),
+    ('feed', 'api:recipes-feed', '', True),
+    ('shopping_cart', 'api:recipes-download_shopping_cart', '', True),
+    ('subscriptions', 'api:users-subscriptions', 'recipes_limit=3', True),
+    ('users', 'api:users-list', '', False),
+    ('users_me', 'api:users-me', '', True),
+    ('tags', 'api:tags-list', '', False),
+    ('ingredients_search', 'api:ingredients-list', 'name={prefix}', False),
+)
+
+
+def percentile(quantiles, value):
+    """Процентиль из 99 границ statistics.quantiles."""
+    return quantiles[value - 1]
+
+
+class EndpointBenchmark:
+    """Замер задержки и числа SQL-запросов эндпоинтов через тест-клиент.
+
+    Параметры запросов подбираются по текущим данным: самый
+    подписанный синтетический пользователь, свежий рецепт, его теги
+    и ингредиенты. Токен выдаётся только синтетическому пользователю
+    из generate_dataset, настоящим пользователям базы - никогда.
+    """
+
+    def __init__(self, iterations, warmup):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.user = User.objects.filter(
+            email__endswith=f'@{EMAIL_DOMAIN}'
+        ).annotate(
+            following=Count('follower')
+        ).order_by('-following', 'id').first()
+        if self.user is None:
+            raise RuntimeError(
+                'Нет синтетических пользователей; '
+                'сначала выполните generate_dataset.'
+            )
+        self.recipe = Recipe.objects.order_by('-pub_date', '-id').first()
+        self.anonymous = Client(SERVER_NAME='localhost')
+        self.client = Client(SERVER_NAME='localhost')
+        token, _ = Token.objects.get_or_create(user=self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+
+    def params(self):
+        tags = list(Tag.objects.values_list('slug', flat=True)[:2])
+        ingredients = list(self.recipe.ingredient_list.values_list(
+            'ingredient_id', 'ingredient__name'
+        )[:3])
+        return {
+            'word': self.recipe.name.split()[0],
+            'tag': tags[0],
+            'other_tag': tags[-1],
+            'ingredients': ','.join(str(pk) for pk, _ in ingredients),
+            'prefix': ingredients[0][1][:2],
+        }
+
+    def url(self, url_name, query, params):
+        args = (self.recipe.id,) if url_name.endswith('-detail') else ()
+        url = reverse(url_name, args=args)
+        if query:
+            url = f'{url}?{query.format(**params)}'
+        return url
+
+    def request(self, client, url):
+        response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def measure(self, client, url):
+        """Статус, число SQL-запросов и процентили задержки в мс."""
+        for _ in range(self.warmup):
+            self.request(client, url)
+        metrics = RequestMetrics()
+        with connection.execute_wrapper(metrics.execute):
+            response = self.request(client, url)
+        timings = []
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(self.iterations):
+                started = time.perf_counter()
+                self.request(client, url)
+                timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            gc.enable()
+        quantiles = statistics.quantiles(timings, n=100)
+        return {
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'p50_ms': round(percentile(quantiles, 50), 2),
+            'p95_ms': round(percentile(quantiles, 95), 2),
+            'p99_ms': round(percentile(quantiles, 99), 2),
+        }
+
+    def run(self, names=None):
+        """Результаты замеров по названиям эндпоинтов."""
+        params = self.params()
+        results = {}
+        for name, url_name, query, auth in ENDPOINTS:
+            if names and name not in names:
+                continue
+            client = self.client if auth else self.anonymous
+            results[name] = self.measure(
+                client, self.url(url_name, query, params)
+            )
+        return results
+
+
+def make_budgets(results):
+    """Бюджеты по результатам замеров с запасом на шум задержки."""
+    return {
+        name: {
+            'queries': result['queries'],
+            'p95_ms': round(max(
+                result['p95_ms'] * BUDGET_HEADROOM, MIN_LATENCY_BUDGET_MS
+            ), 1),
+        }
+        for name, result in results.items()
+    }
+
+
+def check_budgets(results, budgets, tolerance):
+    """Сообщения о превышении бюджетов запросов и задержки."""
+    errors = []
+    for name, result in results.items():
+        budget = budgets.get(name)
+        if budget is None:
+            continue
+        if result['status'] >= 400:
+            errors.append(f'{name}: код ответа {result["status"]}')
+        if result['queries'] > budget['queries']:
+            errors.append(
+                f'{name}: {result["queries"]} SQL-запросов, '
+                f'бюджет {budget["queries"]}'
+            )
+        limit = budget['p95_ms'] * (1 + tolerance)
+        if result['p95_ms'] > limit:
+            errors.append(
+                f'{name}: p95 {result["p95_ms"]} мс, '
+                f'бюджет {budget["p95_ms"]} мс'
+            )
+    return errors
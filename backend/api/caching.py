@@ -0,0 +1,108 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from api.replicas import primary_reads
+from recipes.catalog import get_catalog_version
+from recipes.detail_cache import recipe_detail_key
+from recipes.memberships import (FAVORITES, FOLLOWING, SHOPPING_CART,
+                                 user_memberships)
+
+
+class CatalogCacheMixin:
+    """Кэширование ответов справочников по их версии.
+
+    Ответ сохраняется в кэше под ключом версии справочников и адреса
+    запроса и отдаётся со строгим ETag. Совпадение If-None-Match
+    даёт ответ 304 без обращения к базе данных.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.catalog_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.catalog_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def catalog_response(self, handler, request, *args, **kwargs):
+        """Ответ из кэша или обработчика с заголовками валидации."""
+        key = ':'.join((
+            str(get_catalog_version()),
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+        ))
+        etag = '"{}"'.format(hashlib.md5(key.encode()).hexdigest())
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            cache_key = f'catalog:{etag}'
+            data = cache.get(cache_key)
+            if data is None:
+                # Ответ кэшируется надолго: реплика могла бы отдать
+                # данные старше текущей версии справочников.
+                with primary_reads():
+                    response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(
+                    cache_key, response.data, settings.CATALOG_CACHE_TIMEOUT
+                )
+            else:
+                response = Response(data)
+        response['ETag'] = etag
+        patch_cache_control(
+            response, public=True, max_age=settings.CATALOG_MAX_AGE
+        )
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+
+def with_user_flags(request, data):
+    """Представление рецепта с флагами пользователя запроса."""
+    memberships = user_memberships(request)
+    author = data['author']
+    return {
+        **data,
+        'author': {
+            **author,
+            'is_subscribed': memberships.contains(FOLLOWING, author['id']),
+        },
+        'is_favorited': memberships.contains(FAVORITES, data['id']),
+        'is_in_shopping_cart': memberships.contains(
+            SHOPPING_CART, data['id']
+        ),
+    }
+
+
+class RecipeDetailCacheMixin:
+    """Кэширование представления рецепта, общего для всех пользователей.
+
+    Ответ хранится в кэше по рецепту и адресу сайта, от которого
+    зависят ссылки на изображения. Флаги избранного, списка покупок
+    и подписки на автора подставляются при каждом запросе из наборов
+    пользователя. Кэш сбрасывается сигналами при изменении рецепта,
+    его ингредиентов, тегов и профиля автора.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = str(kwargs.get(self.lookup_url_kwarg or self.lookup_field))
+        # Фильтры в параметрах запроса влияют на поиск рецепта.
+        if request.query_params or not pk.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        key = recipe_detail_key(pk)
+        site = request.build_absolute_uri('/')
+        details = cache.get(key) or {}
+        data = details.get(site)
+        if data is None:
+            # Кэшируемые данные не должны быть старее основной базы.
+            with primary_reads():
+                data = dict(self.get_serializer(self.get_object()).data)
+            details[site] = data
+            cache.set(key, details, settings.RECIPE_DETAIL_CACHE_TIMEOUT)
+        return Response(with_user_flags(request, data))
@@ -0,0 +1,56 @@
+import csv
+import json
+
+SHOPPING_LIST_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Буфер, возвращающий записанную строку вместо её хранения."""
+
+    def write(self, value):
+        return value
+
+
+def text_lines(ingredients):
+    """Строки списка покупок в текстовом виде."""
+    for ingredient in ingredients:
+        yield (
+            f"{ingredient['ingredient__name']}  - "
+            f"{ingredient['sum']}"
+            f"({ingredient['ingredient__measurement_unit']})\n"
+        )
+
+
+def csv_lines(ingredients):
+    """Строки списка покупок в формате CSV."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+    for ingredient in ingredients:
+        yield writer.writerow((
+            ingredient['ingredient__name'],
+            ingredient['sum'],
+            ingredient['ingredient__measurement_unit'],
+        ))
+
+
+def json_lines(ingredients):
+    """Строки списка покупок в формате JSON Lines."""
+    for ingredient in ingredients:
+        yield json.dumps({
+            'name': ingredient['ingredient__name'],
+            'amount': ingredient['sum'],
+            'measurement_unit': ingredient['ingredient__measurement_unit'],
+        }, ensure_ascii=False) + '\n'
+
+
+SHOPPING_LIST_FORMATS = {
+    'txt': (text_lines, 'text/plain; charset=utf-8', 'txt'),
+    'csv': (csv_lines, 'text/csv; charset=utf-8', 'csv'),
+    'jsonl': (json_lines, 'application/x-ndjson; charset=utf-8', 'jsonl'),
+}
+
+
+def stream_shopping_list(ingredients, export_format):
+    """Генератор строк списка покупок в выбранном формате."""
+    lines, _, _ = SHOPPING_LIST_FORMATS[export_format]
+    return lines(ingredients.iterator(chunk_size=SHOPPING_LIST_CHUNK_SIZE))
@@ -1,16 +1,126 @@
 import base64
+import binascii
+import hashlib
+import os
+import re
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile
 from rest_framework import serializers
 
+from recipes.image_variants import stored_variants
+
+BASE64_MARKER = ';base64,'
+DECODE_CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r'\s+')
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+
+def sniff_image_format(head):
+    """Формат изображения по первым байтам файла."""
+    for signature, ext in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
 
 class Base64ImageFieldSerializer(serializers.ImageField):
-    """Сериализатор для обработки полей изображений."""
+    """Сериализатор для обработки полей изображений.
+
+    Строка base64 декодируется частями во временный файл с проверкой
+    размера до декодирования и формата по первым байтам. Файл получает
+    имя по хешу содержимого, поэтому одинаковые изображения хранятся
+    в одном экземпляре.
+    """
+
+    default_error_messages = {
+        'too_large': 'Размер изображения превышает {max_size} байт.',
+        'unknown_format': 'Неподдерживаемый формат изображения.',
+        'invalid_base64': 'Некорректные данные изображения.',
+    }
 
     def to_internal_value(self, data):
         """Обработка изображений."""
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            data = self.decode(data)
         return super().to_internal_value(data)
+
+    def decode(self, data):
+        """Потоковое декодирование data URI во временный файл."""
+        max_size = settings.MAX_IMAGE_UPLOAD_SIZE
+        start = data.find(BASE64_MARKER)
+        if start == -1:
+            self.fail('invalid_base64')
+        start += len(BASE64_MARKER)
+        if (len(data) - start) // 4 * 3 > max_size + 2:
+            self.fail('too_large', max_size=max_size)
+
+        digest = hashlib.sha256()
+        upload = TemporaryUploadedFile('image', None, 0, None)
+        ext = None
+        pending = ''
+        for position in range(start, len(data), DECODE_CHUNK_SIZE):
+            # Переносы строк допустимы; без них часть декодируется
+            # целыми группами по 4 символа, остаток - со следующей.
+            text = pending + WHITESPACE.sub(
+                '', data[position:position + DECODE_CHUNK_SIZE]
+            )
+            end = len(text)
+            if position + DECODE_CHUNK_SIZE < len(data):
+                end -= end % 4
+            text, pending = text[:end], text[end:]
+            try:
+                chunk = base64.b64decode(text, validate=True)
+            except (binascii.Error, ValueError):
+                upload.close()
+                self.fail('invalid_base64')
+            if not chunk:
+                continue
+            if ext is None:
+                ext = sniff_image_format(chunk[:16])
+                if ext is None:
+                    upload.close()
+                    self.fail('unknown_format')
+            digest.update(chunk)
+            upload.write(chunk)
+            upload.size += len(chunk)
+            if upload.size > max_size:
+                upload.close()
+                self.fail('too_large', max_size=max_size)
+        upload.seek(0)
+        upload.name = f'{digest.hexdigest()}.{ext}'
+        return upload
+
+
+class ImageVariantsField(serializers.Field):
+    """Ссылки на уменьшенные копии изображения по ширине и формату.
+
+    Отдаются только созданные копии; для ширины, копий которой ещё
+    нет, отдаётся исходное изображение.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return {}
+        request = self.context.get('request')
+        original = os.path.splitext(value.name)[1][1:].lower()
+        variants = {}
+        for width, names in stored_variants(value.name).items():
+            urls = {}
+            for ext, name in (names or {original: value.name}).items():
+                url = default_storage.url(name)
+                urls[ext] = request.build_absolute_uri(url) if request else url
+            variants[str(width)] = urls
+        return variants
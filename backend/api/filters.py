@@ -1,9 +1,20 @@
 from django.contrib.auth import get_user_model
 from django_filters.rest_framework import FilterSet, filters
+from recipes.ingredient_matching import match_ingredients
 from recipes.models import Recipe, Tag
+from recipes.search import search_recipes
 
 User = get_user_model()
 
+TAGS_MATCH_CHOICES = (
+    ('any', 'Любой из тегов'),
+    ('all', 'Все теги'),
+)
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    """Фильтр по списку чисел через запятую."""
+
 
 class RecipeFilter(FilterSet):
     """Фильтр для отображения избранного и списка покупок."""
@@ -11,13 +22,64 @@ class RecipeFilter(FilterSet):
     tags = filters.ModelMultipleChoiceFilter(
         queryset=Tag.objects.all(),
         field_name='tags__slug',
-        to_field_name='slug'
+        to_field_name='slug',
+        method='tags_filter'
+    )
+    tags_match = filters.ChoiceFilter(
+        choices=TAGS_MATCH_CHOICES, method='tags_match_filter'
+    )
+    search = filters.CharFilter(method='search_filter')
+    ingredients = NumberInFilter(method='ingredients_filter')
+    exclude_ingredients = NumberInFilter(method='exclude_ingredients_filter')
+    max_missing = filters.NumberFilter(
+        method='max_missing_filter', min_value=0
     )
     is_favorited = filters.BooleanFilter(method='favorite_filter')
     is_in_shopping_cart = filters.BooleanFilter(
         method='shopping_cart_filter'
     )
 
+    def tags_filter(self, queryset, name, value):
+        """Фильтр по маске тегов без JOIN и DISTINCT."""
+        if not value:
+            return queryset
+        return queryset.with_tags(
+            value, self.form.cleaned_data.get('tags_match') == 'all'
+        )
+
+    def tags_match_filter(self, queryset, name, value):
+        """Режим сравнения тегов учитывается фильтром по тегам."""
+        return queryset
+
+    def filter_queryset(self, queryset):
+        """Подбор по ингредиентам выполняется после остальных фильтров."""
+        queryset = super().filter_queryset(queryset)
+        value = self.form.cleaned_data.get('ingredients')
+        if not value:
+            return queryset
+        return match_ingredients(
+            queryset,
+            [int(pk) for pk in value],
+            [int(pk) for pk in self.form.cleaned_data.get(
+                'exclude_ingredients'
+            ) or ()],
+            int(self.form.cleaned_data.get('max_missing') or 0)
+        )
+
+    def ingredients_filter(self, queryset, name, value):
+        """Подбор по ингредиентам выполняется в filter_queryset."""
+        return queryset
+
+    def exclude_ingredients_filter(self, queryset, name, value):
+        """Исключение рецептов с ингредиентами без подбора."""
+        if not value or self.form.cleaned_data.get('ingredients'):
+            return queryset
+        return queryset.exclude(ingredients__in=[int(pk) for pk in value])
+
+    def max_missing_filter(self, queryset, name, value):
+        """Допустимое число недостающих ингредиентов учитывается подбором."""
+        return queryset
+
     def favorite_filter(self, queryset, name, value):
         """Фильтр для избранного."""
         user = self.request.user
@@ -32,6 +94,17 @@ class RecipeFilter(FilterSet):
             return queryset.filter(shopping_recipe__user_id=user.id)
         return queryset
 
+    def search_filter(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию рецепта."""
+        value = value.strip()
+        if value:
+            return search_recipes(queryset, value)
+        return queryset
+
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'tags', 'tags_match', 'author', 'is_favorited',
+            'is_in_shopping_cart', 'search',
+            'ingredients', 'exclude_ingredients', 'max_missing'
+        )
@@ -0,0 +1,396 @@
+import http.client
+import json
+import re
+import secrets
+import statistics
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+VARIABLE = re.compile(r'{{\s*(\w+)\s*}}')
+# pm.collectionVariables.set("name", выражение) в тестах коллекции.
+SET_VARIABLE = re.compile(
+    r'pm\.(?:collectionVariables|environment|globals|variables)\.set\(\s*'
+    r'["\'](\w+)["\']\s*,\s*(.+?)\s*\);?\s*$'
+)
+# const name = _.get(responseData, "path");
+GET_VARIABLE = re.compile(
+    r'(?:const|let|var)\s+(\w+)\s*=\s*_\.get\(\s*responseData\s*,'
+    r'\s*["\']([\w.\[\]]+)["\']\s*\)'
+)
+RESPONSE_PATH = re.compile(
+    r'^responseData((?:\[\d+\]|\.\w+)*?)'
+    r'(?:\.slice\(\s*(\d+)\s*,\s*(\d+)\s*\))?$'
+)
+PATH_PART = re.compile(r'\[(\d+)\]|\.?(\w+)')
+# Переменные с уникальными данными пользователя: у каждого
+# виртуального пользователя и итерации свои значения.
+IDENTITY_KEYS = ('email', 'username')
+RETRY_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError,
+                BrokenPipeError)
+URL_SAFE = "/?&=%:@!$'()*+,;~"
+
+
+def parse_path(path):
+    """Путь в ответе: ключи словарей и индексы списков."""
+    return tuple(
+        int(index) if index else key
+        for index, key in PATH_PART.findall(path)
+    )
+
+
+def parse_extractions(script):
+    """Переменные, которые тест сохраняет из ответа, и пути к ним.
+
+    JavaScript коллекции не исполняется: распознаются присваивания
+    вида _.get(responseData, "id") и responseData[0].name.slice(0, 1).
+    """
+    lines = [line.strip() for line in script]
+    aliases = {}
+    for line in lines:
+        match = GET_VARIABLE.search(line)
+        if match:
+            aliases[match.group(1)] = parse_path(match.group(2))
+    extractions = []
+    for line in lines:
+        match = SET_VARIABLE.search(line)
+        if not match:
+            continue
+        name, expression = match.groups()
+        if expression in aliases:
+            extractions.append((name, aliases[expression], None))
+            continue
+        path = RESPONSE_PATH.match(expression)
+        if path:
+            start, stop = path.group(2), path.group(3)
+            extractions.append((
+                name,
+                parse_path(path.group(1)),
+                slice(int(start), int(stop)) if start else None
+            ))
+    return extractions
+
+
+def parse_auth(auth):
+    """Заголовки авторизации Postman: noauth, apikey или bearer."""
+    if not auth or auth['type'] == 'noauth':
+        return {}
+    values = {item['key']: item.get('value', '')
+              for item in auth.get(auth['type'], ())}
+    if auth['type'] == 'apikey':
+        if values.get('in', 'header') != 'header':
+            raise ValueError('Поддерживается только apikey в заголовке.')
+        return {values['key']: values['value']}
+    if auth['type'] == 'bearer':
+        return {'Authorization': f'Bearer {values["token"]}'}
+    raise ValueError(f'Неподдерживаемая авторизация: {auth["type"]}.')
+
+
+class CollectionRequest:
+    """Запрос коллекции Postman с унаследованной авторизацией."""
+
+    def __init__(self, name, item, auth):
+        request = item['request']
+        self.name = name
+        self.method = request['method']
+        url = request['url']
+        self.url = url['raw'] if isinstance(url, dict) else url
+        self.headers = {
+            header['key']: header['value']
+            for header in request.get('header', ())
+            if not header.get('disabled')
+        }
+        self.headers.update(parse_auth(request.get('auth', auth)))
+        body = request.get('body') or {}
+        self.body = body.get('raw') if body.get('mode') == 'raw' else None
+        if self.body and not any(
+            key.lower() == 'content-type' for key in self.headers
+        ):
+            self.headers['Content-Type'] = 'application/json'
+        self.extractions = []
+        for event in item.get('event', ()):
+            if event['listen'] == 'test':
+                self.extractions += parse_extractions(event['script']['exec'])
+
+
+def load_collection(path, skip=()):
+    """Переменные и запросы коллекции Postman v2.1 в порядке выполнения.
+
+    Запросы, в пути которых встречается одна из строк skip,
+    пропускаются.
+    """
+    with open(path, encoding='utf-8') as file:
+        collection = json.load(file)
+    variables = {
+        variable['key']: variable.get('value', '')
+        for variable in collection.get('variable', ())
+    }
+    requests = []
+
+    def walk(items, prefix, auth):
+        for item in items:
+            name = f'{prefix}/{item["name"]}' if prefix else item['name']
+            if any(part in name for part in skip):
+                continue
+            if 'item' in item:
+                walk(item['item'], name, item.get('auth', auth))
+            else:
+                requests.append(CollectionRequest(name, item, auth))
+
+    walk(collection['item'], '', collection.get('auth'))
+    return variables, requests
+
+
+def unique_identity(value, suffix):
+    """Email или имя пользователя с суффиксом виртуального пользователя."""
+    quoted = value.startswith('"') and value.endswith('"')
+    if not quoted:
+        return value
+    local, at, domain = value[1:-1].partition('@')
+    if at:
+        return f'"{local}+{suffix}@{domain}"'
+    return f'"{local}-{suffix}"'
+
+
+def latency_summary(timings):
+    """Процентили и среднее задержки в мс."""
+    if len(timings) > 1:
+        quantiles = statistics.quantiles(timings, n=100, method='inclusive')
+        p50, p95, p99 = quantiles[49], quantiles[94], quantiles[98]
+    else:
+        p50 = p95 = p99 = timings[0] if timings else 0.0
+    return {
+        'p50_ms': round(p50, 2),
+        'p95_ms': round(p95, 2),
+        'p99_ms': round(p99, 2),
+        'mean_ms': round(statistics.fmean(timings), 2) if timings else 0.0,
+        'max_ms': round(max(timings, default=0.0), 2),
+    }
+
+
+class VirtualUser(threading.Thread):
+    """Виртуальный пользователь, выполняющий коллекцию по порядку.
+
+    У каждого пользователя своё соединение с сервером и свои
+    переменные коллекции; данные регистрации уникальны для каждой
+    итерации, поэтому пользователи не конфликтуют между собой.
+    """
+
+    def __init__(self, runner, number, delay):
+        super().__init__(name=f'vu-{number}', daemon=True)
+        self.runner = runner
+        self.number = number
+        self.delay = delay
+        self.connection = None
+        # Имя запроса -> задержки в мс, коды ответов, ошибки.
+        self.timings = {}
+        self.statuses = {}
+        self.errors = {}
+
+    def run(self):
+        runner = self.runner
+        time.sleep(self.delay)
+        iteration = 0
+        while not runner.finished(iteration):
+            self.variables = runner.iteration_variables(self.number, iteration)
+            for request in runner.requests:
+                if runner.deadline and time.monotonic() >= runner.deadline:
+                    break
+                self.execute(request)
+            iteration += 1
+        if self.connection:
+            self.connection.close()
+
+    def substitute(self, text):
+        return VARIABLE.sub(
+            lambda match: str(self.variables.get(
+                match.group(1), match.group(0)
+            )),
+            text
+        )
+
+    def send(self, method, path, body, headers):
+        if self.connection is None:
+            self.connection = self.runner.connect()
+        reused = self.connection.sock is not None
+        try:
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            return response, response.read()
+        except RETRY_ERRORS:
+            self.connection.close()
+            if not reused:
+                raise
+            # Сервер закрыл простаивавшее соединение: повтор на новом.
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            return response, response.read()
+
+    def execute(self, request):
+        url = urlsplit(self.substitute(request.url))
+        path = url.path or '/'
+        if url.query:
+            path = f'{path}?{url.query}'
+        path = quote(path, safe=URL_SAFE)
+        body = request.body and self.substitute(request.body).encode()
+        headers = {
+            key: self.substitute(value)
+            for key, value in request.headers.items()
+        }
+        started = time.perf_counter()
+        try:
+            response, content = self.send(
+                request.method, path, body, headers
+            )
+        except (OSError, ValueError, http.client.HTTPException) as error:
+            self.connection.close()
+            name = type(error).__name__
+            errors = self.errors.setdefault(request.name, {})
+            errors[name] = errors.get(name, 0) + 1
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        self.timings.setdefault(request.name, []).append(elapsed)
+        statuses = self.statuses.setdefault(request.name, {})
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+        if request.extractions and 200 <= response.status < 300:
+            self.extract(request, content)
+
+    def extract(self, request, content):
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return
+        for name, path, part in request.extractions:
+            value = data
+            try:
+                for key in path:
+                    value = value[key]
+            except (KeyError, IndexError, TypeError):
+                continue
+            self.variables[name] = value[part] if part else value
+
+
+class LoadTest:
+    """Нагрузочный прогон коллекции Postman виртуальными пользователями.
+
+    Пользователи запускаются равномерно в течение ramp_up секунд и
+    выполняют коллекцию iterations раз либо до истечения duration
+    секунд. Задержка каждого запроса - от отправки до получения
+    всего тела ответа.
+    """
+
+    def __init__(self, variables, requests, base_url=None, users=1,
+                 ramp_up=0.0, iterations=1, duration=None, timeout=30):
+        self.variables = variables
+        self.requests = requests
+        self.base_url = urlsplit(
+            base_url or variables.get('baseUrl', 'http://127.0.0.1:8000')
+        )
+        self.users = users
+        self.ramp_up = ramp_up
+        self.iterations = iterations
+        self.duration = duration
+        self.timeout = timeout
+        self.run_id = secrets.token_hex(3)
+        self.deadline = None
+
+    def connect(self):
+        connection_class = (
+            http.client.HTTPSConnection if self.base_url.scheme == 'https'
+            else http.client.HTTPConnection
+        )
+        return connection_class(self.base_url.netloc, timeout=self.timeout)
+
+    def finished(self, iteration):
+        if self.deadline:
+            return time.monotonic() >= self.deadline
+        return iteration >= self.iterations
+
+    def iteration_variables(self, number, iteration):
+        suffix = f'{self.run_id}-{number}-{iteration}'
+        variables = dict(self.variables)
+        variables['baseUrl'] = ''
+        for key, value in variables.items():
+            if key.lower().endswith(IDENTITY_KEYS):
+                variables[key] = unique_identity(value, suffix)
+        return variables
+
+    def run(self):
+        """Результаты прогона: общие и по каждому запросу коллекции."""
+        step = self.ramp_up / self.users if self.users > 1 else 0
+        virtual_users = [
+            VirtualUser(self, number, number * step)
+            for number in range(self.users)
+        ]
+        started = time.monotonic()
+        if self.duration:
+            self.deadline = started + self.ramp_up + self.duration
+        for virtual_user in virtual_users:
+            virtual_user.start()
+        for virtual_user in virtual_users:
+            virtual_user.join()
+        elapsed = time.monotonic() - started
+        return self.results(virtual_users, elapsed)
+
+    def results(self, virtual_users, elapsed):
+        requests = {}
+        all_timings = []
+        for request in self.requests:
+            timings, statuses, errors = [], {}, {}
+            for virtual_user in virtual_users:
+                timings += virtual_user.timings.get(request.name, ())
+                for counts, merged in (
+                    (virtual_user.statuses, statuses),
+                    (virtual_user.errors, errors),
+                ):
+                    for key, count in counts.get(request.name, {}).items():
+                        merged[str(key)] = merged.get(str(key), 0) + count
+            all_timings += timings
+            requests[request.name] = {
+                'method': request.method,
+                'url': request.url,
+                'count': len(timings),
+                'throughput_rps': round(len(timings) / elapsed, 2),
+                **latency_summary(timings),
+                'statuses': statuses,
+                'errors': errors,
+            }
+        return {
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'base_url': self.base_url.geturl(),
+            'users': self.users,
+            'ramp_up_s': self.ramp_up,
+            'iterations': None if self.duration else self.iterations,
+            'duration_s': round(elapsed, 2),
+            'total': {
+                'count': len(all_timings),
+                'throughput_rps': round(len(all_timings) / elapsed, 2),
+                **latency_summary(all_timings),
+                'errors': sum(
+                    sum(result['errors'].values())
+                    for result in requests.values()
+                ),
+            },
+            'requests': requests,
+        }
+
+
+def compare_results(results, baseline):
+    """Изменение p95 относительно прошлого прогона.
+
+    Возвращает строки (запрос, p95 было, p95 стало, изменение в %)
+    для запросов, присутствующих в обоих прогонах.
+    """
+    rows = []
+    previous = dict(baseline['requests'], total=baseline['total'])
+    current = dict(results['requests'], total=results['total'])
+    for name, result in current.items():
+        before = previous.get(name)
+        if not before or not before['count'] or not result['count']:
+            continue
+        change = (
+            (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+            if before['p95_ms'] else 0.0
+        )
+        rows.append((name, before['p95_ms'], result['p95_ms'], change))
+    return rows
@@ -0,0 +1,138 @@
+import os
+import time
+from contextvars import ContextVar
+
+from django.http import HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+LABELS = ('view', 'action')
+INF = float('inf')
+
+REQUEST_DURATION = Histogram(
+    'foodgram_request_duration_seconds',
+    'Время обработки запроса.',
+    LABELS
+)
+REQUESTS = Counter(
+    'foodgram_requests',
+    'Количество запросов по методу и коду ответа.',
+    LABELS + ('method', 'status')
+)
+DB_QUERIES = Histogram(
+    'foodgram_db_queries',
+    'Количество SQL-запросов за запрос.',
+    LABELS,
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, INF)
+)
+DB_DURATION = Histogram(
+    'foodgram_db_duration_seconds',
+    'Время выполнения SQL-запросов за запрос.',
+    LABELS
+)
+SERIALIZER_DURATION = Histogram(
+    'foodgram_serializer_duration_seconds',
+    'Время сериализации ответа.',
+    LABELS
+)
+RESPONSE_SIZE = Histogram(
+    'foodgram_response_size_bytes',
+    'Размер тела ответа.',
+    LABELS,
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, INF)
+)
+
+
+class RequestMetrics:
+    """Показатели одного запроса, собираемые по ходу его обработки."""
+
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'serializer_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def execute(self, execute, sql, params, many, context):
+        """Обёртка выполнения SQL для connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+def execute_with_metrics(execute, sql, params, many, context):
+    """Учёт SQL-запроса в показателях текущего запроса.
+
+    Подключается ко всем соединениям при их создании; показатели
+    передаются через контекст, поэтому учитываются и запросы из
+    потоков асинхронных представлений.
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.execute(execute, sql, params, many, context)
+
+
+class MeasuredSerializerMixin:
+    """Учёт времени сериализации в показателях запроса.
+
+    Вложенные сериализаторы не учитываются повторно: время
+    считается только для самого внешнего вызова.
+    """
+
+    def to_representation(self, instance):
+        metrics = current_metrics.get()
+        if metrics is None or metrics.serializer_depth:
+            return super().to_representation(instance)
+        metrics.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+            metrics.serializer_depth -= 1
+
+
+def view_labels(view_func, method):
+    """Метки представления и действия для показателей."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return f'{view_func.__module__}.{view_func.__name__}', method.lower()
+    actions = getattr(view_func, 'actions', None) or {}
+    return cls.__name__, actions.get(method.lower(), method.lower())
+
+
+def observe(labels, method, response, duration, metrics):
+    """Запись показателей завершённого запроса."""
+    REQUEST_DURATION.labels(*labels).observe(duration)
+    REQUESTS.labels(*labels, method, response.status_code).inc()
+    DB_QUERIES.labels(*labels).observe(metrics.queries)
+    DB_DURATION.labels(*labels).observe(metrics.db_time)
+    if metrics.serializer_time:
+        SERIALIZER_DURATION.labels(*labels).observe(metrics.serializer_time)
+    if not response.streaming:
+        RESPONSE_SIZE.labels(*labels).observe(len(response.content))
+
+
+def get_registry():
+    """Реестр показателей всех процессов или текущего процесса."""
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """Показатели в текстовом формате Prometheus."""
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
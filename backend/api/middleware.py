@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from api.metrics import RequestMetrics, current_metrics, observe, view_labels
+from api.replicas import (SAFE_METHODS, read_alias, read_database,
+                          stick_to_primary)
+
+UNRESOLVED = ('unresolved', '')
+
+
+class AsyncCapableMiddleware:
+    """Основа middleware, работающего и под WSGI, и под ASGI.
+
+    Под ASGI middleware становится корутиной, и асинхронные
+    представления не переводятся в синхронный режим.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.acall(request)
+        return self.call(request)
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """Сбор показателей производительности по представлениям.
+
+    Для каждого запроса учитываются время обработки, количество
+    и время SQL-запросов, время сериализации, размер ответа и код
+    ответа с метками представления и действия.
+    """
+
+    def call(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        self.observe(request, response, started, metrics)
+        return response
+
+    async def acall(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        self.observe(request, response, started, metrics)
+        return response
+
+    def observe(self, request, response, started, metrics):
+        match = getattr(request, 'resolver_match', None)
+        observe(
+            view_labels(match.func, request.method) if match else UNRESOLVED,
+            request.method,
+            response,
+            time.perf_counter() - started,
+            metrics
+        )
+
+
+class ReplicaMiddleware(AsyncCapableMiddleware):
+    """Выбор базы для чтения на время запроса.
+
+    Чтение запросов API безопасными методами идёт с реплики, если
+    клиент недавно не изменял данные; после успешной записи клиент
+    на REPLICA_STICKY_SECONDS закрепляется за основной базой.
+    """
+
+    def call(self, request):
+        token = read_database.set(read_alias(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            read_database.reset(token)
+        stick_to_primary(request, response)
+        return response
+
+    async def acall(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        token = read_database.set(
+            await sync_to_async(read_alias, thread_sensitive=False)(request)
+        )
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_database.reset(token)
+        if request.method not in SAFE_METHODS:
+            await sync_to_async(
+                stick_to_primary, thread_sensitive=False
+            )(request, response)
+        return response
@@ -1,7 +1,131 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
 from django.conf import settings
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from recipes.feed import feed_positions
+from recipes.models import keyset_filter
+from recipes.search import is_ranked
 
 
 class LimitPagination(PageNumberPagination):
     page_size = settings.PAGE_SIZE
     page_size_query_param = 'limit'
+
+
+class RecipePagination(LimitPagination):
+    """Постраничная пагинация рецептов с режимом курсора.
+
+    Режим курсора включается параметром cursor (пустое значение -
+    первая страница). Позиция задаётся парой (pub_date, id), поэтому
+    любая страница стоит одного диапазонного запроса по индексу
+    без OFFSET и COUNT, а курсоры не сдвигаются при новых публикациях.
+    Результаты поиска упорядочены по релевантности и всегда
+    разбиваются на страницы по номеру.
+    """
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def use_cursor(self, request):
+        """Включён ли режим курсора для запроса."""
+        return self.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = (
+            self.use_cursor(request) and not is_ranked(queryset)
+        )
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(), self.page_query_param
+        )
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        results = self.fetch(queryset, position, reverse, page_size + 1)
+        has_more = len(results) > page_size
+        self.page = results[:page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def fetch(self, queryset, position, reverse, size):
+        """Не более size рецептов после позиции в порядке обхода."""
+        return list(keyset_filter(
+            queryset, position, reverse, 'pub_date', 'id'
+        )[:size])
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict((
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        )))
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, recipe, reverse):
+        """Ссылка на страницу, соседнюю с рецептом."""
+        payload = json.dumps(
+            (recipe.pub_date.isoformat(), recipe.id, reverse)
+        ).encode()
+        cursor = base64.urlsafe_b64encode(payload).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, cursor
+        )
+
+    def decode_cursor(self, request):
+        """Позиция и направление из курсора запроса."""
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            pub_date, pk, reverse = json.loads(
+                base64.urlsafe_b64decode(cursor.encode())
+            )
+            pub_date = parse_datetime(pub_date)
+            pk = int(pk)
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (pub_date, pk), bool(reverse)
+
+
+class FeedPagination(RecipePagination):
+    """Пагинация ленты подписок, всегда в режиме курсора."""
+
+    def use_cursor(self, request):
+        return True
+
+    def fetch(self, queryset, position, reverse, size):
+        positions = feed_positions(self.request.user, position, reverse, size)
+        recipes = queryset.in_bulk([pk for _, pk in positions])
+        return [recipes[pk] for _, pk in positions if pk in recipes]
@@ -0,0 +1,32 @@
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from api.renderers import msgpack
+
+
+class ORJSONParser(BaseParser):
+    """Разбор тела запроса в JSON через orjson."""
+
+    media_type = 'application/json'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as error:
+            raise ParseError(f'JSON parse error - {error}')
+
+
+class MessagePackParser(BaseParser):
+    """Разбор тела запроса в MessagePack.
+
+    Доступен, если установлен пакет msgpack.
+    """
+
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read())
+        except (ValueError, TypeError, msgpack.UnpackException) as error:
+            raise ParseError(f'MessagePack parse error - {error}')
@@ -0,0 +1,96 @@
+import io
+import statistics
+import time
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import MessagePackParser, ORJSONParser
+from api.renderers import MessagePackRenderer, ORJSONRenderer, msgpack
+from api.serializers import IngredientSerializer, ReadRecipeSerializer
+from recipes.models import Ingredient, Recipe
+
+# Формат -> рендерер и парсер; первый формат - база для сравнения.
+FORMATS = {
+    'drf_json': (JSONRenderer, JSONParser),
+    'orjson': (ORJSONRenderer, ORJSONParser),
+    'msgpack': (MessagePackRenderer, MessagePackParser),
+}
+BASELINE = 'drf_json'
+
+
+def available_formats():
+    """Форматы, доступные в текущем окружении."""
+    return [name for name in FORMATS if name != 'msgpack' or msgpack]
+
+
+def payloads(page_size):
+    """Данные ответов RecipeViewSet и IngredientViewSet из текущей базы."""
+    recipes = Recipe.objects.for_read().order_by('-pub_date', '-id')
+    return {
+        'recipe_page': {
+            'count': Recipe.objects.count(),
+            'next': None,
+            'previous': None,
+            'results': ReadRecipeSerializer(
+                recipes[:page_size], many=True
+            ).data,
+        },
+        'recipe_detail': ReadRecipeSerializer(recipes.first()).data,
+        'ingredients': IngredientSerializer(
+            Ingredient.objects.all(), many=True
+        ).data,
+    }
+
+
+def median_ms(func, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+class RendererBenchmark:
+    """Замер отрисовки и разбора одних и тех же данных в разных форматах.
+
+    Для каждого формата измеряется медиана времени рендерера и парсера;
+    ускорение считается относительно стандартных классов DRF.
+    """
+
+    def __init__(self, iterations, page_size):
+        self.iterations = iterations
+        self.page_size = page_size
+
+    def measure(self, data, renderer, parser):
+        content = renderer.render(data)
+        render_ms = median_ms(lambda: renderer.render(data), self.iterations)
+        parse_ms = median_ms(
+            lambda: parser.parse(io.BytesIO(content)), self.iterations
+        )
+        return {
+            'bytes': len(content),
+            'render_ms': round(render_ms, 3),
+            'parse_ms': round(parse_ms, 3),
+        }
+
+    def run(self, formats=None):
+        """Результаты по данным и форматам с ускорением к DRF JSON."""
+        formats = formats or available_formats()
+        results = {}
+        for payload, data in payloads(self.page_size).items():
+            rows = {}
+            for name in [BASELINE] + [f for f in formats if f != BASELINE]:
+                renderer, parser = FORMATS[name]
+                rows[name] = self.measure(data, renderer(), parser())
+            baseline = rows[BASELINE]
+            for row in rows.values():
+                row['render_speedup'] = round(
+                    baseline['render_ms'] / row['render_ms'], 2
+                ) if row['render_ms'] else None
+                row['parse_speedup'] = round(
+                    baseline['parse_ms'] / row['parse_ms'], 2
+                ) if row['parse_ms'] else None
+            results[payload] = rows
+        return results
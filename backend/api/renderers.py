@@ -0,0 +1,59 @@
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+# Символы, которые JSONRenderer экранирует для встраивания в <script>.
+UNSAFE_SEPARATORS = (
+    (b'\xe2\x80\xa8', b'\\u2028'),
+    (b'\xe2\x80\xa9', b'\\u2029'),
+)
+
+drf_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    """Типы, которые кодировщики не знают: те же правила, что в DRF."""
+    return drf_encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON через orjson вместо стандартного json.
+
+    Ответ совпадает с ответом JSONRenderer: UTF-8 без экранирования
+    не-ASCII символов, отступ по параметру indent в Accept.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        options = ORJSON_OPTIONS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+        content = orjson.dumps(data, default=encode_default, option=options)
+        for separator, escaped in UNSAFE_SEPARATORS:
+            if separator in content:
+                content = content.replace(separator, escaped)
+        return content
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Ответ в MessagePack по запросу Accept: application/msgpack.
+
+    Доступен, если установлен пакет msgpack.
+    """
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default)
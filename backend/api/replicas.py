@@ -0,0 +1,157 @@
+import hashlib
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+# Модели, которые всегда читаются с основной базы: токен, только что
+# выданный при входе, может ещё не дойти до реплики.
+PRIMARY_MODELS = ('authtoken.token',)
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Отставание реплики в секундах; 0, если всё полученное применено.
+POSTGRESQL_LAG = (
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() '
+    'THEN 0 ELSE COALESCE(EXTRACT(EPOCH FROM '
+    'now() - pg_last_xact_replay_timestamp()), 0) END'
+)
+
+read_database = ContextVar('read_database', default=None)
+
+
+class ReplicaHealth:
+    """Доступность реплик с проверкой не чаще раза в интервал.
+
+    Реплика считается недоступной, если к ней нельзя подключиться
+    или её отставание от основной базы больше REPLICA_MAX_LAG секунд.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Реплика -> (время проверки, доступна ли).
+        self.checks = {}
+        self.order = itertools.count()
+
+    def check(self, alias):
+        try:
+            with connections[alias].cursor() as cursor:
+                if connections[alias].vendor != 'postgresql':
+                    cursor.execute('SELECT 1')
+                    return True
+                cursor.execute(POSTGRESQL_LAG)
+                lag, = cursor.fetchone()
+        except DatabaseError:
+            connections[alias].close()
+            return False
+        return not settings.REPLICA_MAX_LAG or lag <= settings.REPLICA_MAX_LAG
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        with self.lock:
+            checked, healthy = self.checks.get(alias, (None, True))
+            if checked is not None and (
+                now - checked < settings.REPLICA_HEALTH_INTERVAL
+            ):
+                return healthy
+            # Другие потоки пока пользуются прошлым результатом.
+            self.checks[alias] = (now, healthy)
+        healthy = self.check(alias)
+        with self.lock:
+            self.checks[alias] = (now, healthy)
+        return healthy
+
+    def choose(self):
+        """Доступная реплика по кругу или None."""
+        replicas = settings.DATABASE_REPLICAS
+        start = next(self.order)
+        for shift in range(len(replicas)):
+            alias = replicas[(start + shift) % len(replicas)]
+            if self.is_healthy(alias):
+                return alias
+        return None
+
+
+replica_health = ReplicaHealth()
+
+
+@contextmanager
+def primary_reads():
+    """Чтение с основной базы внутри блока, например для долгого кэша."""
+    token = read_database.set(None)
+    try:
+        yield
+    finally:
+        read_database.reset(token)
+
+
+def sticky_key(request):
+    """Ключ закрепления клиента за основной базой по его токену."""
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    digest = hashlib.sha256(authorization.encode()).hexdigest()
+    return f'replicas:sticky:{digest}'
+
+
+def is_api_read(request):
+    return (
+        request.method in SAFE_METHODS
+        and request.path.startswith('/api/')
+    )
+
+
+def read_alias(request):
+    """База для чтения в запросе: реплика или None для основной.
+
+    Клиент, недавно изменявший данные, читает с основной базы, чтобы
+    сразу видеть свои изменения.
+    """
+    if not settings.DATABASE_REPLICAS or not is_api_read(request):
+        return None
+    key = sticky_key(request)
+    if key and (not settings.CACHE_IS_SHARED or cache.get(key)):
+        # Без общего кэша закрепление не видно другим процессам.
+        return None
+    return replica_health.choose()
+
+
+def stick_to_primary(request, response):
+    """Закрепление клиента за основной базой после успешной записи."""
+    if (
+        not settings.DATABASE_REPLICAS
+        or request.method in SAFE_METHODS
+        or response.status_code >= 400
+    ):
+        return
+    key = sticky_key(request)
+    if key:
+        cache.set(key, True, settings.REPLICA_STICKY_SECONDS)
+
+
+class ReplicaRouter:
+    """Чтение запросов API с реплик, запись и всё остальное - в основную базу.
+
+    Реплика для чтения выбирается ReplicaMiddleware на время запроса;
+    вне запросов (команды, фоновые задачи) используется основная база.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower in PRIMARY_MODELS:
+            return DEFAULT_DB_ALIAS
+        alias = read_database.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -6,8 +6,11 @@ from rest_framework import exceptions, serializers
 
 from djoser.serializers import UserSerializer
 
-from api.fields import Base64ImageFieldSerializer
+from api.fields import Base64ImageFieldSerializer, ImageVariantsField
+from api.metrics import MeasuredSerializerMixin
 
+from recipes.memberships import (FAVORITES, FOLLOWING, SHOPPING_CART,
+                                 user_memberships)
 from recipes.models import (Favourites, Ingredient, IngredientRecipe,
                             Recipe, ShoppingList, Tag)
 from users.models import FoodgramUser ,Follow
@@ -15,7 +18,7 @@ from users.models import FoodgramUser ,Follow
 User = get_user_model()
 
 
-class UserAvatarSerializer(UserSerializer):
+class UserAvatarSerializer(MeasuredSerializerMixin, UserSerializer):
     """Сериализатор для аватара пользователя."""
 
     avatar = Base64ImageFieldSerializer(required=False, allow_null=True)
@@ -34,6 +37,7 @@ class FoodgramUserSerializer(UserAvatarSerializer):
     """Сериализатор для работы с пользователями."""
 
     is_subscribed = serializers.SerializerMethodField()
+    avatar_variants = ImageVariantsField(source='avatar')
 
     class Meta:
         model = User
@@ -44,18 +48,18 @@ class FoodgramUserSerializer(UserAvatarSerializer):
             'first_name',
             'last_name',
             'is_subscribed',
-            'avatar'
+            'avatar',
+            'avatar_variants',
+            'followers_count'
         )
 
     def get_is_subscribed(self, obj):
         """Проверка подписок пользователя."""
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
-        return (
-            request
-            and request.user.is_authenticated
-            and Follow.objects.filter(
-                user=request.user, author=obj.id
-            ).exists()
+        return bool(request) and user_memberships(request).contains(
+            FOLLOWING, obj.id
         )
 
 
@@ -87,7 +91,6 @@ class FollowSerializer(FoodgramUserSerializer):
     """Сериализатор работы с подписками."""
 
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = FoodgramUser
@@ -95,15 +98,19 @@ class FollowSerializer(FoodgramUserSerializer):
             'id',
             'email',
             'avatar',
+            'avatar_variants',
             'recipes',
             'username',
             'last_name',
             'first_name',
             'is_subscribed',
-            'recipes_count'
+            'recipes_count',
+            'followers_count'
         )
 
     def get_recipes(self, obj):
+        if hasattr(obj, 'recipes_preview'):
+            return ShortRecipeSerializer(obj.recipes_preview, many=True).data
         request = self.context.get('request')
         limit = request.GET.get('recipes_limit')
         queryset = Recipe.objects.filter(author=obj)
@@ -111,11 +118,8 @@ class FollowSerializer(FoodgramUserSerializer):
             queryset = queryset[:int(limit)]
         return ShortRecipeSerializer(queryset, many=True).data
 
-    def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj).count()
-
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для модели Тег."""
 
     class Meta:
@@ -123,7 +127,8 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'slug')
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(MeasuredSerializerMixin,
+                           serializers.ModelSerializer):
     """Сериализатор для модели ингредиента."""
 
     class Meta:
@@ -148,10 +153,7 @@ class IngredientsRecipeSerializer(serializers.ModelSerializer):
 class CreateIngredientsInRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор создания ингредиента в создании рецепта."""
 
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-        write_only=True
-    )
+    id = serializers.IntegerField(write_only=True)
 
     class Meta:
         model = IngredientRecipe
@@ -159,12 +161,14 @@ class CreateIngredientsInRecipeSerializer(serializers.ModelSerializer):
 
 
 class CreateRecipeSerializer(serializers.ModelSerializer):
-    """Сериализатор для создания рецептов."""
+    """Сериализатор для создания рецептов.
+
+    Существование тегов и ингредиентов проверяется одним запросом
+    на каждую модель, а при обновлении записываются только изменения.
+    """
 
     ingredients = CreateIngredientsInRecipeSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=Tag.objects.all()
-    )
+    tags = serializers.ListField(child=serializers.IntegerField())
     image = Base64ImageFieldSerializer(use_url=True)
 
     class Meta:
@@ -180,10 +184,11 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         """Метод представления модели."""
+        request = self.context.get('request')
         serializer = ReadRecipeSerializer(
-            instance,
+            Recipe.objects.for_read().get(pk=instance.pk),
             context={
-                'request': self.context.get('request')
+                'request': request
             }
         )
         return serializer.data
@@ -212,22 +217,69 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 'Ингредиенты не должны повторяться!'
             )
+
+        self.__check_exist(Tag, tags, 'tags', 'Теги не существуют')
+        self.__check_exist(
+            Ingredient, ids, 'ingredients', 'Ингредиенты не существуют'
+        )
         return data
 
-    def __create_ingredients(self, ingredients, recipe):
-        """Метод создания ингредиента."""
-        ingredient_data = []
-        for element in ingredients:
-            id = element['id']
-            amount = element['amount']
-            ingredient_data.append(
-                IngredientRecipe(ingredient=id, recipe=recipe, amount=amount)
+    def __check_exist(self, model, ids, field, message):
+        """Проверка существования объектов одним запросом."""
+        found = set(model.objects.filter(id__in=ids).values_list(
+            'id', flat=True
+        ))
+        missing = [str(pk) for pk in ids if pk not in found]
+        if missing:
+            raise serializers.ValidationError(
+                {field: f'{message}: {", ".join(missing)}.'}
             )
-        IngredientRecipe.objects.bulk_create(ingredient_data)
 
-    def __create_tags(self, tags, recipe):
-        """Метод добавления тега."""
-        recipe.tags.set(tags)
+    def __set_ingredients(self, ingredients, recipe, existing=()):
+        """Запись разницы между текущими и новыми ингредиентами."""
+        amounts = {element['id']: element['amount'] for element in ingredients}
+        to_delete = []
+        to_update = []
+        for item in existing:
+            amount = amounts.pop(item.ingredient_id, None)
+            if amount is None:
+                to_delete.append(item.id)
+            elif amount != item.amount:
+                item.amount = amount
+                to_update.append(item)
+        if to_delete:
+            IngredientRecipe.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            IngredientRecipe.objects.bulk_update(to_update, ('amount',))
+        if amounts:
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(
+                    ingredient_id=ingredient_id, recipe=recipe, amount=amount
+                )
+                for ingredient_id, amount in amounts.items()
+            )
+
+    def __set_tags(self, tags, recipe, existing=()):
+        """Запись разницы между текущими и новыми тегами."""
+        TagLink = Recipe.tags.through
+        tags = set(tags)
+        existing = {tag.id for tag in existing}
+        if existing - tags:
+            TagLink.objects.filter(
+                recipe=recipe, tag_id__in=existing - tags
+            ).delete()
+        if tags - existing:
+            TagLink.objects.bulk_create(
+                TagLink(recipe=recipe, tag_id=tag_id)
+                for tag_id in tags - existing
+            )
+        if tags != existing:
+            recipe.tag_mask = sum(tag.mask for tag in Tag.objects.filter(
+                id__in=tags
+            ))
+            Recipe.objects.filter(pk=recipe.pk).update(
+                tag_mask=recipe.tag_mask
+            )
 
     @transaction.atomic
     def create(self, validated_data):
@@ -239,31 +291,37 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
             author=request.user, **validated_data
         )
 
-        self.__create_ingredients(ingredients, recipe)
-        self.__create_tags(tags, recipe)
+        self.__set_ingredients(ingredients, recipe)
+        self.__set_tags(tags, recipe)
         return recipe
 
     @transaction.atomic
     def update(self, instance, validated_data):
         """Метод обновления модели."""
-        instance.tags.clear()
-        instance.ingredients.clear()
-
-        self.__create_ingredients(validated_data.pop('ingredients'), instance)
-        self.__create_tags(validated_data.pop('tags'), instance)
-
+        self.__set_ingredients(
+            validated_data.pop('ingredients'),
+            instance,
+            instance.ingredient_list.all()
+        )
+        self.__set_tags(
+            validated_data.pop('tags'), instance, instance.tags.all()
+        )
         return super().update(instance, validated_data)
 
 
-class ShortRecipeSerializer(serializers.ModelSerializer):
+class ShortRecipeSerializer(MeasuredSerializerMixin,
+                            serializers.ModelSerializer):
     """Вспомогательный сериализатор для рецептов."""
 
+    image_variants = ImageVariantsField(source='image')
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
 
 
-class ReadRecipeSerializer(serializers.ModelSerializer):
+class ReadRecipeSerializer(MeasuredSerializerMixin,
+                           serializers.ModelSerializer):
     """Сериализатор модели Рецепт."""
 
     author = FoodgramUserSerializer(read_only=True)
@@ -273,6 +331,7 @@ class ReadRecipeSerializer(serializers.ModelSerializer):
                                               read_only=True)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_variants = ImageVariantsField(source='image')
 
     class Meta:
         model = Recipe
@@ -282,33 +341,27 @@ class ReadRecipeSerializer(serializers.ModelSerializer):
             'author',
             'name',
             'image',
+            'image_variants',
             'text',
             'ingredients',
             'is_favorited',
             'is_in_shopping_cart',
-            'cooking_time'
+            'cooking_time',
+            'favorites_count'
         )
 
     def get_is_favorited(self, obj):
         """Проверка наличия рецепта в избранном."""
         request = self.context.get('request')
-        return (
-            request
-            and request.user.is_authenticated
-            and Favourites.objects.filter(
-                user=request.user.id, recipe=obj.id
-            ).exists()
+        return bool(request) and user_memberships(request).contains(
+            FAVORITES, obj.id
         )
 
     def get_is_in_shopping_cart(self, obj):
         """Проверка наличия рецепта в списке покупок."""
         request = self.context.get('request')
-        return (
-            request
-            and request.user.is_authenticated
-            and ShoppingList.objects.filter(
-                user=request.user.id, recipe=obj.id
-            ).exists()
+        return bool(request) and user_memberships(request).contains(
+            SHOPPING_CART, obj.id
         )
 
 
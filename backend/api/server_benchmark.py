@@ -0,0 +1,236 @@
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+from api.load_test import latency_summary
+from recipes.models import Ingredient, Recipe
+
+# Сервер -> (приложение, класс рабочих процессов gunicorn, асинхронные
+# представления).
+SERVERS = {
+    'wsgi': ('foodgram.wsgi:application', 'sync', False),
+    'asgi': (
+        'foodgram.asgi:application', 'uvicorn.workers.UvicornWorker', True
+    ),
+}
+READY_PATH = '/api/tags/'
+
+
+def read_paths():
+    """Пути горячих эндпоинтов чтения для данных в базе."""
+    recipe = Recipe.objects.order_by('-pub_date').first()
+    ingredient = Ingredient.objects.order_by('id').first()
+    paths = {
+        'recipes': '/api/recipes/?limit=6',
+        'tags': '/api/tags/',
+    }
+    if recipe:
+        paths['recipe'] = f'/api/recipes/{recipe.id}/'
+        if recipe.short_url:
+            paths['short_link'] = f'/s/{recipe.short_url}'
+    if ingredient:
+        prefix = ingredient.name[:2]
+        paths['ingredients'] = f'/api/ingredients/?name={prefix}'
+    return paths
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """Сервер gunicorn, запущенный на время замера."""
+
+    def __init__(self, name, workers, timeout=30):
+        self.name = name
+        self.workers = workers
+        self.timeout = timeout
+        self.port = free_port()
+        self.process = None
+        self.metrics_dir = None
+
+    def command(self):
+        application, worker_class, _ = SERVERS[self.name]
+        return [
+            sys.executable, '-m', 'gunicorn',
+            '-c', os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'),
+            '--bind', f'127.0.0.1:{self.port}',
+            '--workers', str(self.workers),
+            '--worker-class', worker_class,
+            '--log-level', 'warning',
+            application,
+        ]
+
+    def environment(self):
+        _, _, async_views = SERVERS[self.name]
+        return {
+            **os.environ,
+            'ASYNC_READ_VIEWS': 'true' if async_views else 'false',
+            'PROMETHEUS_MULTIPROC_DIR': self.metrics_dir.name,
+        }
+
+    def __enter__(self):
+        self.metrics_dir = tempfile.TemporaryDirectory(prefix='foodgram-')
+        self.process = subprocess.Popen(
+            self.command(),
+            cwd=settings.BASE_DIR,
+            env=self.environment(),
+            stdin=subprocess.DEVNULL,
+        )
+        self.wait_ready()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(self.timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.metrics_dir.cleanup()
+
+    def wait_ready(self):
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(
+                    f'Сервер {self.name} завершился с кодом '
+                    f'{self.process.returncode}.'
+                )
+            try:
+                connection = http.client.HTTPConnection(
+                    '127.0.0.1', self.port, timeout=1
+                )
+                connection.request('GET', READY_PATH)
+                if connection.getresponse().status == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError(f'Сервер {self.name} не запустился.')
+
+
+class Client(threading.Thread):
+    """Клиент с постоянным соединением, отправляющий запросы подряд."""
+
+    def __init__(self, load, number):
+        super().__init__(name=f'client-{number}', daemon=True)
+        self.load = load
+        self.number = number
+        # Эндпоинт -> задержки в мс; количество ошибок.
+        self.timings = {name: [] for name in load.paths}
+        self.errors = {name: 0 for name in load.paths}
+
+    def connect(self):
+        return http.client.HTTPConnection(
+            '127.0.0.1', self.load.port, timeout=self.load.timeout
+        )
+
+    def run(self):
+        load = self.load
+        names = list(load.paths)
+        connection = self.connect()
+        request = self.number
+        while time.monotonic() < load.deadline:
+            name = names[request % len(names)]
+            request += 1
+            started = time.perf_counter()
+            try:
+                connection.request('GET', load.paths[name])
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                self.errors[name] += 1
+                connection.close()
+                connection = self.connect()
+                continue
+            elapsed = (time.perf_counter() - started) * 1000
+            if response.status >= 400:
+                self.errors[name] += 1
+            elif time.monotonic() >= load.measure_from:
+                self.timings[name].append(elapsed)
+        connection.close()
+
+
+class ServerLoad:
+    """Замкнутая нагрузка: concurrency клиентов без пауз между запросами.
+
+    Первые warmup секунд не учитываются: за это время процессы
+    сервера открывают соединения с базой и заполняют кэши.
+    """
+
+    def __init__(self, port, paths, concurrency, duration, warmup,
+                 timeout=30):
+        self.port = port
+        self.paths = paths
+        self.concurrency = concurrency
+        self.duration = duration
+        self.warmup = warmup
+        self.timeout = timeout
+        self.measure_from = None
+        self.deadline = None
+
+    def run(self):
+        clients = [Client(self, number) for number in range(self.concurrency)]
+        self.measure_from = time.monotonic() + self.warmup
+        self.deadline = self.measure_from + self.duration
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        return self.results(clients)
+
+    def results(self, clients):
+        endpoints = {}
+        all_timings = []
+        for name in self.paths:
+            timings = [
+                timing for client in clients for timing in client.timings[name]
+            ]
+            all_timings += timings
+            endpoints[name] = {
+                'path': self.paths[name],
+                'count': len(timings),
+                'throughput_rps': round(len(timings) / self.duration, 2),
+                **latency_summary(timings),
+                'errors': sum(client.errors[name] for client in clients),
+            }
+        return {
+            'total': {
+                'count': len(all_timings),
+                'throughput_rps': round(len(all_timings) / self.duration, 2),
+                **latency_summary(all_timings),
+                'errors': sum(
+                    result['errors'] for result in endpoints.values()
+                ),
+            },
+            'endpoints': endpoints,
+        }
+
+
+def benchmark_servers(servers, paths, workers, concurrency, duration,
+                      warmup, timeout=30):
+    """Результаты замера каждого сервера на одних и тех же эндпоинтах."""
+    results = {}
+    for name in servers:
+        with Server(name, workers, timeout) as server:
+            results[name] = ServerLoad(
+                server.port, paths, concurrency, duration, warmup, timeout
+            ).run()
+    return {
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'workers': workers,
+        'concurrency': concurrency,
+        'duration_s': duration,
+        'servers': results,
+    }
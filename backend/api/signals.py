@@ -0,0 +1,11 @@
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from api.metrics import execute_with_metrics
+
+
+@receiver(connection_created)
+def add_metrics_wrapper(connection, **kwargs):
+    """Учёт SQL-запросов нового соединения в показателях запросов."""
+    if execute_with_metrics not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_with_metrics)
@@ -0,0 +1,33 @@
+import os
+import re
+
+from django.core.files.storage import FileSystemStorage
+
+CONTENT_HASH_NAME = re.compile(r'^[0-9a-f]{64}\.\w+$')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, записывающее файл с хешем в имени только один раз.
+
+    Если файл с таким именем уже есть, его содержимое совпадает,
+    и новый экземпляр не сохраняется. Остальные файлы сохраняются
+    как обычно.
+    """
+
+    def is_content_addressed(self, name):
+        return bool(CONTENT_HASH_NAME.match(os.path.basename(name)))
+
+    def get_available_name(self, name, max_length=None):
+        if self.is_content_addressed(name) and self.exists(name):
+            return name
+        return super().get_available_name(name, max_length)
+
+    def _save(self, name, content):
+        if self.is_content_addressed(name) and self.exists(name):
+            saved = name
+        else:
+            saved = super()._save(name, content)
+        if hasattr(content, 'temporary_file_path'):
+            # Временный файл перемещён на место хранения или не нужен.
+            content.close()
+        return saved
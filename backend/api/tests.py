@@ -0,0 +1,501 @@
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import TOKEN_CACHE, token_cache_key
+from recipes.ingredient_matching import recipe_ingredient_index
+from recipes.memberships import FAVORITES, membership_key
+from recipes.models import (
+    Favourites,
+    Ingredient,
+    IngredientRecipe,
+    Recipe,
+    ShoppingList,
+    Tag,
+)
+from users.models import Follow, FoodgramUser
+
+LOCAL_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests',
+    },
+    'tokens': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests-tokens',
+    },
+}
+PAGE_SIZES = (2, 6)
+RECIPES_COUNT = 8
+# Запросы к базе при пустом кэше: подсчёт, рецепты страницы, теги и
+# ингредиенты; авторизованному пользователю добавляются токен и наборы
+# подписок, избранного и списка покупок.
+ANONYMOUS_LIST_QUERIES = 4
+AUTHORIZED_LIST_QUERIES = 8
+ANONYMOUS_DETAIL_QUERIES = 3
+AUTHORIZED_DETAIL_QUERIES = 7
+
+# Вторая локальная база, заменяющая реплику: схема в ней есть, данных
+# тестов нет, поэтому ответ показывает, с какой базы шло чтение.
+REPLICA = 'replica_test'
+settings.DATABASES.setdefault(REPLICA, {
+    **settings.DATABASES['default'],
+    'TEST': (
+        {} if settings.DATABASES['default']['ENGINE'].endswith('sqlite3')
+        else {'NAME': f"test_{settings.DATABASES['default']['NAME']}_replica"}
+    ),
+})
+
+
+@override_settings(CACHES=LOCAL_CACHES, CACHE_IS_SHARED=False)
+class RecipeDataTestCase(TestCase):
+    """Авторы, теги, ингредиенты и рецепты для проверок API.
+
+    Рецепт number принадлежит автору number % 3, отмечен первыми
+    number % 3 + 1 тегами и содержит первые number % 5 + 1
+    ингредиентов; нечётные рецепты читатель добавил в избранное
+    и список покупок.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        tags = [
+            Tag.objects.create(name=f'Тег {number}', slug=f'tag{number}')
+            for number in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(5)
+        ]
+        cls.tags = tags
+        cls.ingredients = ingredients
+        cls.authors = authors = [
+            FoodgramUser.objects.create_user(
+                email=f'author{number}@example.com',
+                username=f'author{number}',
+                first_name='Имя',
+                last_name='Фамилия',
+                password='Pa$$w0rd-author',
+            )
+            for number in range(3)
+        ]
+        cls.user = FoodgramUser.objects.create_user(
+            email='reader@example.com',
+            username='reader',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='Pa$$w0rd-reader',
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        Follow.objects.create(user=cls.user, author=authors[0])
+        for number in range(RECIPES_COUNT):
+            recipe = Recipe.objects.create(
+                author=authors[number % len(authors)],
+                name=f'Рецепт {number}',
+                text='Описание',
+                cooking_time=10,
+                image='recipes/images/recipe.png',
+            )
+            recipe.tags.set(tags[:number % len(tags) + 1])
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(
+                    recipe=recipe, ingredient=ingredient, amount=10
+                )
+                for ingredient in ingredients[:number % len(ingredients) + 1]
+            )
+            if number % 2:
+                Favourites.objects.create(user=cls.user, recipe=recipe)
+                ShoppingList.objects.create(user=cls.user, recipe=recipe)
+        cls.recipe = Recipe.objects.order_by('-pub_date').first()
+        cls.recipes = list(Recipe.objects.order_by('id'))
+
+    def setUp(self):
+        self.clear_caches()
+        self.anonymous = APIClient()
+        self.authorized = APIClient()
+        self.authorized.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def clear_caches(self):
+        for backend in caches.all():
+            backend.clear()
+
+
+class RecipeQueriesTest(RecipeDataTestCase):
+    """Число запросов к базе данных при чтении рецептов.
+
+    Число запросов не должно зависеть от размера страницы: связанные
+    объекты страницы загружаются пачкой, а не для каждого рецепта.
+    """
+
+    def assert_list_queries(self, client, expected):
+        for limit in PAGE_SIZES:
+            with self.subTest(limit=limit):
+                self.clear_caches()
+                with self.assertNumQueries(expected):
+                    response = client.get('/api/recipes/', {'limit': limit})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), limit)
+
+    def test_anonymous_list(self):
+        self.assert_list_queries(self.anonymous, ANONYMOUS_LIST_QUERIES)
+
+    def test_authorized_list(self):
+        self.assert_list_queries(self.authorized, AUTHORIZED_LIST_QUERIES)
+
+    def test_anonymous_detail(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        with self.assertNumQueries(ANONYMOUS_DETAIL_QUERIES):
+            response = self.anonymous.get(url)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.anonymous.get(url).data, response.data)
+
+    def test_authorized_detail(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        with self.assertNumQueries(AUTHORIZED_DETAIL_QUERIES):
+            response = self.authorized.get(url)
+        self.assertEqual(response.status_code, 200)
+        # Повторно читается только токен: рецепт и наборы уже в кэше.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authorized.get(url).data, response.data)
+
+
+class IngredientMatchTest(RecipeDataTestCase):
+    """Подбор рецептов по ингредиентам вместе с другими фильтрами."""
+
+    def setUp(self):
+        super().setUp()
+        recipe_ingredient_index.build()
+
+    def match(self, **params):
+        params = {
+            'ingredients': self.ingredients[0].id,
+            'max_missing': len(self.ingredients),
+            'author': self.authors[1].id,
+            **params,
+        }
+        response = self.anonymous.get('/api/recipes/', params)
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    @override_settings(RECIPE_MATCH_LIMIT=1, RECIPE_MATCH_MAX_BATCHES=8)
+    def test_limit_after_filters(self):
+        # Лучший рецепт автора стоит в подборе пятым.
+        self.assertEqual(self.match(limit=1), [self.recipes[1].id])
+
+    @override_settings(RECIPE_MATCH_LIMIT=1, RECIPE_MATCH_MAX_BATCHES=2)
+    def test_batches_limit_queries(self):
+        # Автор для фильтра и две проверенные пачки подбора.
+        with self.assertNumQueries(3):
+            self.assertEqual(self.match(), [])
+
+
+@override_settings(CACHE_IS_SHARED=True)
+class TokenCacheTest(RecipeDataTestCase):
+    """Кэш токенов при общем бэкенде кэша."""
+
+    def setUp(self):
+        super().setUp()
+        self.cache = caches[TOKEN_CACHE]
+        self.key = token_cache_key(self.token.key)
+        response = self.authorized.get('/api/users/me/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(self.cache.get(self.key))
+
+    def test_cached_token(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.authorized.get('/api/users/me/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any(
+            'authtoken_token' in query['sql']
+            for query in context.captured_queries
+        ))
+
+    def test_logout(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.authorized.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(self.cache.get(self.key))
+        self.assertEqual(
+            self.authorized.get('/api/users/me/').status_code, 401
+        )
+
+    def test_token_deletion(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+            # Токен удаляется из кэша ещё до фиксации транзакции.
+            self.assertIsNone(self.cache.get(self.key))
+        self.assertEqual(
+            self.authorized.get('/api/users/me/').status_code, 401
+        )
+
+
+class MembershipFlagsTest(RecipeDataTestCase):
+    """Флаги избранного и подписки после изменения связей."""
+
+    def flags(self, recipe):
+        data = self.authorized.get(f'/api/recipes/{recipe.id}/').data
+        return data['is_favorited'], data['author']['is_subscribed']
+
+    def test_toggle_favorite(self):
+        recipe = self.recipes[0]
+        self.assertEqual(self.flags(recipe), (False, True))
+        url = f'/api/recipes/{recipe.id}/favorite/'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.authorized.post(url).status_code, 201)
+        self.assertEqual(self.flags(recipe), (True, True))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.authorized.delete(url).status_code, 204)
+        self.assertEqual(self.flags(recipe), (False, True))
+
+    def test_changes_outside_api(self):
+        recipe = self.recipes[0]
+        self.assertEqual(self.flags(recipe), (False, True))
+        with self.captureOnCommitCallbacks(execute=True):
+            Favourites.objects.create(user=self.user, recipe=recipe)
+            Follow.objects.filter(user=self.user).delete()
+        self.assertEqual(self.flags(recipe), (True, False))
+
+    def test_cascade_delete(self):
+        key = membership_key(FAVORITES, self.user.id)
+        self.assertTrue(self.flags(self.recipes[1])[0])
+        self.assertIn(self.recipes[1].id, cache.get(key))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipes[1].delete()
+        self.assertIsNone(cache.get(key))
+
+
+@override_settings(
+    CACHES=LOCAL_CACHES, CACHE_IS_SHARED=True, DATABASE_REPLICAS=[REPLICA]
+)
+class ReplicaReadsTest(TransactionTestCase):
+    """Распределение чтения между основной базой и репликой.
+
+    Роутер читает с основной базы внутри транзакции, поэтому тест
+    не оборачивается в неё.
+    """
+
+    databases = {'default', REPLICA}
+
+    def setUp(self):
+        for backend in caches.all():
+            backend.clear()
+        self.user = FoodgramUser.objects.create_user(
+            email='reader@example.com',
+            username='reader',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='Pa$$w0rd-reader',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        self.recipe = Recipe.objects.create(
+            author=self.user,
+            name='Рецепт',
+            text='Описание',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+        )
+        self.authorized = APIClient()
+        self.authorized.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def get(self, client, path):
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response.data, self.data_queries(replica)
+
+    @staticmethod
+    def data_queries(context):
+        """Число запросов к данным без проверки доступности реплики."""
+        return sum(
+            query['sql'] != 'SELECT 1' for query in context.captured_queries
+        )
+
+    def test_reads_from_replica(self):
+        data, replica_queries = self.get(APIClient(), '/api/recipes/')
+        self.assertEqual(data['count'], 0)
+        self.assertGreater(replica_queries, 0)
+
+    def test_writes_and_sticky_window(self):
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = self.authorized.post(
+                f'/api/recipes/{self.recipe.id}/favorite/'
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.data_queries(replica), 0)
+        self.assertTrue(Favourites.objects.filter(user=self.user).exists())
+        data, replica_queries = self.get(self.authorized, '/api/recipes/')
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(replica_queries, 0)
+        # Другие клиенты по-прежнему читают с реплики.
+        data, _ = self.get(APIClient(), '/api/recipes/')
+        self.assertEqual(data['count'], 0)
+
+    def test_catalog_reads_primary(self):
+        data, replica_queries = self.get(APIClient(), '/api/tags/')
+        self.assertEqual([tag['slug'] for tag in data], ['breakfast'])
+        self.assertEqual(replica_queries, 0)
+
+
+class CursorPaginationTest(RecipeDataTestCase):
+    """Постраничный вывод рецептов по курсору."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Одинаковые даты публикации проверяют порядок по id.
+        Recipe.objects.filter(id__in=[
+            recipe.id for recipe in cls.recipes[2:5]
+        ]).update(pub_date=cls.recipes[2].pub_date)
+
+    def walk(self, url, link):
+        ids = []
+        while url:
+            response = self.anonymous.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.append([recipe['id'] for recipe in response.data['results']])
+            url = response.data[link]
+        return ids
+
+    def test_stable_order(self):
+        expected = list(Recipe.objects.order_by(
+            '-pub_date', '-id'
+        ).values_list('id', flat=True))
+        pages = self.walk('/api/recipes/?cursor=&limit=3', 'next')
+        self.assertEqual(sum(pages, []), expected)
+        last = self.anonymous.get('/api/recipes/?cursor=&limit=3')
+        for _ in pages[1:]:
+            last = self.anonymous.get(last.data['next'])
+        backwards = self.walk(last.data['previous'], 'previous')
+        self.assertEqual(
+            sum(reversed(backwards), []) + pages[-1], expected
+        )
+
+    def test_new_recipe_does_not_shift_pages(self):
+        first = self.anonymous.get('/api/recipes/?cursor=&limit=3')
+        Recipe.objects.create(
+            author=self.authors[0],
+            name='Новый рецепт',
+            text='Описание',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+        )
+        second = self.anonymous.get(first.data['next'])
+        expected = list(Recipe.objects.order_by(
+            '-pub_date', '-id'
+        ).values_list('id', flat=True))[4:7]
+        self.assertEqual(
+            [recipe['id'] for recipe in second.data['results']], expected
+        )
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-a-cursor', 'bnVsbA==', 'WyJ4IiwgMSwgZmFsc2Vd'):
+            with self.subTest(cursor=cursor):
+                response = self.anonymous.get(
+                    '/api/recipes/', {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 404)
+
+
+class TagFilterTest(RecipeDataTestCase):
+    """Фильтр по всем тегам через маску тегов рецепта."""
+
+    def tagged(self, *slugs):
+        response = self.anonymous.get('/api/recipes/', {
+            'tags': slugs, 'tags_match': 'all', 'limit': RECIPES_COUNT
+        })
+        self.assertEqual(response.status_code, 200)
+        return sorted(recipe['id'] for recipe in response.data['results'])
+
+    def numbered(self, *numbers):
+        return sorted(self.recipes[number].id for number in numbers)
+
+    def test_all_tags(self):
+        self.assertEqual(
+            self.tagged('tag0', 'tag1'), self.numbered(1, 2, 4, 5, 7)
+        )
+        self.assertEqual(self.tagged('tag0', 'tag2'), self.numbered(2, 5))
+
+    def test_recipe_tags_edit(self):
+        self.recipes[0].tags.add(self.tags[1])
+        self.recipes[1].tags.remove(self.tags[1])
+        self.assertEqual(
+            self.tagged('tag0', 'tag1'), self.numbered(0, 2, 4, 5, 7)
+        )
+
+    def test_recipe_tags_patch(self):
+        recipe = self.recipes[2]
+        client = APIClient()
+        client.force_authenticate(recipe.author)
+        response = client.patch(f'/api/recipes/{recipe.id}/', {
+            'tags': [self.tags[0].id],
+            'ingredients': [{'id': self.ingredients[0].id, 'amount': 5}],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.tagged('tag0', 'tag2'), self.numbered(5))
+
+    def test_tag_slug_edit(self):
+        tag = self.tags[1]
+        tag.slug = 'renamed'
+        tag.save()
+        self.assertEqual(
+            self.tagged('tag0', 'renamed'), self.numbered(1, 2, 4, 5, 7)
+        )
+
+    def test_tag_deletion(self):
+        # Новый тег получает бит удалённого; рецепты его не наследуют.
+        self.tags[2].delete()
+        self.assertEqual(
+            self.tagged('tag0', 'tag1'), self.numbered(1, 2, 4, 5, 7)
+        )
+        Tag.objects.create(name='Новый тег', slug='new')
+        self.assertEqual(self.tagged('tag0', 'new'), [])
+
+
+class RecipeDetailCacheTest(RecipeDataTestCase):
+    """Сброс кэша рецепта после его изменения."""
+
+    def test_patch(self):
+        recipe = self.recipe
+        url = f'/api/recipes/{recipe.id}/'
+        self.anonymous.get(url)
+        with self.assertNumQueries(0):
+            self.anonymous.get(url)
+        author = APIClient()
+        author.force_authenticate(recipe.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = author.patch(url, {
+                'name': 'Новое название',
+                'tags': [self.tags[0].id],
+                'ingredients': [{'id': self.ingredients[4].id, 'amount': 7}],
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        data = self.anonymous.get(url).data
+        self.assertEqual(data['name'], 'Новое название')
+        self.assertEqual([tag['slug'] for tag in data['tags']], ['tag0'])
+        self.assertEqual(
+            [(item['id'], item['amount']) for item in data['ingredients']],
+            [(self.ingredients[4].id, 7)]
+        )
+
+    def test_author_profile(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        self.anonymous.get(url)
+        author = self.recipe.author
+        author.first_name = 'Другое'
+        with self.captureOnCommitCallbacks(execute=True):
+            author.save()
+        self.assertEqual(
+            self.anonymous.get(url).data['author']['first_name'], 'Другое'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            author.save(update_fields=('last_login',))
+        with self.assertNumQueries(0):
+            self.anonymous.get(url)
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import include, path, re_path
 from rest_framework import routers
 
+from api.async_views import async_routes
 from api.views import (IngredientViewSet, TagViewSet,
                        RecipeViewSet, FoodgramUserViewSet)
 
@@ -12,8 +14,12 @@ router.register('ingredients', IngredientViewSet, basename='ingredients')
 router.register('recipes', RecipeViewSet, basename='recipes')
 router.register(r'users', FoodgramUserViewSet, basename='users')
 
+router_urls = router.urls
+if settings.ASYNC_READ_VIEWS:
+    router_urls = async_routes(router_urls)
+
 urlpatterns = [
-    path('', include(router.urls)),
+    path('', include(router_urls)),
     path('auth/', include('djoser.urls')),
     re_path(r'^auth/', include('djoser.urls.authtoken'))
 ]
@@ -1,18 +1,22 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import BooleanField, Prefetch, Sum, Value
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.filters import SearchFilter
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
+from api.caching import CatalogCacheMixin, RecipeDetailCacheMixin
+from api.exports import SHOPPING_LIST_FORMATS, stream_shopping_list
 from api.filters import RecipeFilter
+from api.negotiation import IgnoreFormatContentNegotiation
+from api.pagination import FeedPagination, RecipePagination
 from api.permissions import IsAuthorOrReadOnlyPermission
 from api.serializers import (
     CreateRecipeSerializer,
@@ -25,6 +29,13 @@ from api.serializers import (
     TagSerializer,
     UserAvatarSerializer,
 )
+from recipes.ingredient_index import ingredient_index
+from recipes.memberships import (
+    FAVORITES,
+    FOLLOWING,
+    SHOPPING_CART,
+    user_memberships,
+)
 from recipes.models import (
     Favourites,
     Ingredient,
@@ -48,6 +59,13 @@ class FoodgramUserViewSet(UserViewSet):
             return (IsAuthenticated(),)
         return super().get_permissions()
 
+    def get_instance(self):
+        """Текущий пользователь с актуальными счётчиками.
+
+        Пользователь запроса может быть взят из кэша авторизации.
+        """
+        return User.objects.get(pk=self.request.user.pk)
+
     @action(detail=False,
             methods=('PUT', 'DELETE',),
             url_path='me/avatar',
@@ -76,7 +94,17 @@ class FoodgramUserViewSet(UserViewSet):
             url_name='subscriptions')
     def subscriptions(self, request):
         """Просмотр подписок пользователя."""
-        queryset = User.objects.filter(publisher__user=request.user)
+        recipes = Recipe.objects.all()
+        limit = request.GET.get('recipes_limit')
+        if limit:
+            recipes = recipes.latest_per_author(int(limit))
+        queryset = User.objects.filter(
+            publisher__user=request.user
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField())
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='recipes_preview')
+        )
         pages = self.paginate_queryset(queryset)
         serializer = FollowSerializer(
             pages,
@@ -100,6 +128,7 @@ class FoodgramUserViewSet(UserViewSet):
                 context={'request': request, 'user': user})
             serializer.is_valid(raise_exception=True)
             serializer.save()
+            user_memberships(request).changed(FOLLOWING)
             return Response(
                 data=serializer.data, status=status.HTTP_201_CREATED
             )
@@ -109,12 +138,15 @@ class FoodgramUserViewSet(UserViewSet):
         if delete_count == 0:
             return Response({'errors': 'Вы уже отписались!'},
                             status=status.HTTP_400_BAD_REQUEST)
+        user_memberships(request).changed(FOLLOWING)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class FoodgramReadOnlyModelViewSet(viewsets.ReadOnlyModelViewSet):
+class FoodgramReadOnlyModelViewSet(CatalogCacheMixin,
+                                   viewsets.ReadOnlyModelViewSet):
     """Модель 'только для чтения' с настройками."""
 
+    authentication_classes = ()
     permission_classes = (AllowAny,)
     pagination_class = None
 
@@ -132,29 +164,65 @@ class IngredientViewSet(FoodgramReadOnlyModelViewSet):
     permission_classes = (IsAuthorOrReadOnlyPermission,)
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = (SearchFilter,)
-    search_fields = ('^name',)
 
+    def list(self, request, *args, **kwargs):
+        return self.catalog_response(self.search, request, *args, **kwargs)
+
+    def search(self, request, *args, **kwargs):
+        """Поиск ингредиентов по началу названия без запросов к базе."""
+        limit = request.query_params.get('limit', '')
+        return Response(ingredient_index.search(
+            request.query_params.get('name', ''),
+            int(limit) if limit.isdigit() else None
+        ))
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+class RecipeViewSet(RecipeDetailCacheMixin, viewsets.ModelViewSet):
     """ViewSet для управления рецептами."""
 
-    queryset = Recipe.objects.all()
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
+    pagination_class = RecipePagination
     permission_classes = (IsAuthorOrReadOnlyPermission,)
 
+    def get_queryset(self):
+        """Рецепты с данными для сериализации за постоянное число запросов."""
+        return Recipe.objects.for_read()
+
     def get_serializer_class(self):
         """Метод вызова определенного сериализатора."""
         if self.action in ('create', 'partial_update'):
             return CreateRecipeSerializer
         return ReadRecipeSerializer
 
+    @action(methods=('GET',),
+            detail=False,
+            permission_classes=(IsAuthenticated,),
+            pagination_class=FeedPagination,
+            url_path='feed')
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь."""
+        pages = self.paginate_queryset(self.get_queryset())
+        serializer = ReadRecipeSerializer(
+            pages, many=True, context={'request': request}
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(methods=('GET',), detail=False, url_path='tag_facets')
+    def tag_facets(self, request):
+        """Количество рецептов с каждым тегом для текущих фильтров."""
+        queryset = self.filter_queryset(Recipe.objects.all())
+        data = [
+            {**TagSerializer(tag).data, 'count': count}
+            for tag, count in queryset.tag_facets()
+        ]
+        return Response(data, status=status.HTTP_200_OK)
+
     @action(methods=('GET',), detail=True, url_path='get-link')
     def get_link(self, request, pk=None):
         """Получение короткой ссылки рецепта."""
         recipe = self.get_object()
-        short_link = request.build_absolute_uri(f'/{recipe.short_url}')
+        short_link = request.build_absolute_uri(f'/s/{recipe.short_url}')
         data = {'short-link': short_link}
         return Response(data, status=status.HTTP_200_OK)
 
@@ -168,33 +236,44 @@ class RecipeViewSet(viewsets.ModelViewSet):
         get_object_or_404(Recipe, id=pk)
         if request.method == 'POST':
             return self.__create_obj_recipes(
-                ShoppingListSerializer, request, pk
+                ShoppingListSerializer, request, pk, SHOPPING_CART
             )
-        return self.__delete_obj_recipes(request, ShoppingList, pk)
+        return self.__delete_obj_recipes(
+            request, ShoppingList, pk, SHOPPING_CART
+        )
 
     @action(methods=('GET',),
             detail=False,
             permission_classes=(IsAuthenticated,),
+            content_negotiation_class=IgnoreFormatContentNegotiation,
             url_path='download_shopping_cart',
             url_name='download_shopping_cart')
     def download_shopping_list(self, request):
         """Загрузка списка покупок."""
+        export_format = request.query_params.get('format', 'txt')
+        if export_format not in SHOPPING_LIST_FORMATS:
+            return Response(
+                {'errors': 'Доступные форматы: '
+                 + ', '.join(SHOPPING_LIST_FORMATS)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         ingredients = IngredientRecipe.objects.filter(
             recipe__shopping_recipe__user=request.user
         ).values(
             'ingredient__name',
             'ingredient__measurement_unit'
         ).order_by('ingredient__name').annotate(sum=Sum('amount'))
-        result = ''
-        for ingredient in ingredients:
-            result += (
-                f"{ingredient['ingredient__name']}  - "
-                f"{ingredient['sum']}"
-                f"({ingredient['ingredient__measurement_unit']})\n"
-            )
-        response = HttpResponse(result, content_type='text/plain')
+        _, content_type, extension = SHOPPING_LIST_FORMATS[export_format]
+        lines = stream_shopping_list(ingredients, export_format)
+        if isinstance(request._request, ASGIRequest):
+            # Под ASGI Django 3.2 перебирает потоковый ответ в цикле
+            # событий, где ORM недоступен, поэтому список собирается
+            # целиком здесь, в потоке синхронного представления.
+            response = HttpResponse(''.join(lines), content_type=content_type)
+        else:
+            response = StreamingHttpResponse(lines, content_type=content_type)
         response['Content-Disposition'] = (
-            'attachment; filename="shopping_list.txt"'
+            f'attachment; filename="shopping_list.{extension}"'
         )
         return response
 
@@ -208,19 +287,20 @@ class RecipeViewSet(viewsets.ModelViewSet):
         get_object_or_404(Recipe, id=pk)
         if request.method == 'POST':
             return self.__create_obj_recipes(
-                FavouritesSerializer, request, pk
+                FavouritesSerializer, request, pk, FAVORITES
             )
-        return self.__delete_obj_recipes(request, Favourites, pk)
+        return self.__delete_obj_recipes(request, Favourites, pk, FAVORITES)
 
-    def __create_obj_recipes(self, serializer, request, pk):
+    def __create_obj_recipes(self, serializer, request, pk, memberships):
         """Добавить."""
         data = {'user': request.user.id, 'recipe': int(pk)}
         serializer_obj = serializer(data=data)
         serializer_obj.is_valid(raise_exception=True)
         serializer_obj.save()
+        user_memberships(request).changed(memberships)
         return Response(serializer_obj.data, status=status.HTTP_201_CREATED)
 
-    def __delete_obj_recipes(self, request, model, pk):
+    def __delete_obj_recipes(self, request, model, pk, memberships):
         """Удалить."""
         delete_count, _ = model.objects.filter(
             user=request.user, recipe__id=pk
@@ -228,4 +308,5 @@ class RecipeViewSet(viewsets.ModelViewSet):
         if delete_count == 0:
             return Response({'errors': 'Рецепт уже удален'},
                             status=status.HTTP_400_BAD_REQUEST)
+        user_memberships(request).changed(memberships)
         return Response(status=status.HTTP_204_NO_CONTENT)
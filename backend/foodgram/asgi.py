@@ -1,7 +1,27 @@
 import os
+import threading
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
 application = get_asgi_application()
+
+from django.db import connections  # noqa: E402
+from recipes.ingredient_index import ingredient_index  # noqa: E402
+from recipes.ingredient_matching import (  # noqa: E402
+    recipe_ingredient_index
+)
+
+
+def warm_indexes():
+    ingredient_index.warm()
+    recipe_ingredient_index.warm()
+    connections.close_all()
+
+
+# Сервер может импортировать приложение внутри цикла событий, где
+# синхронный ORM недоступен, поэтому индексы строятся в другом потоке.
+warming = threading.Thread(target=warm_indexes)
+warming.start()
+warming.join()
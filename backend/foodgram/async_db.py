@@ -0,0 +1,25 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def database_sync_to_async(func):
+    """Синхронная работа с базой данных из асинхронного представления.
+
+    Функция выполняется в пуле потоков (thread_sensitive=False), поэтому
+    запросы разных клиентов не ждут друг друга в единственном потоке
+    синхронного кода. Соединения потока закрываются до и после вызова
+    так же, как в начале и конце обычного запроса. Размер пула задаёт
+    переменная окружения ASGI_THREADS.
+    """
+
+    @wraps(func)
+    def call(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(call, thread_sensitive=False)
@@ -1,4 +1,5 @@
 import os
+from importlib.util import find_spec
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -7,12 +8,54 @@ load_dotenv()
 
 PAGE_SIZE = 6
 
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', default=300))
+
+RECIPE_INGREDIENT_INDEX_TTL = int(
+    os.getenv('RECIPE_INGREDIENT_INDEX_TTL', default=3600)
+)
+
+RECIPE_MATCH_LIMIT = 1000
+
+# Сколько пачек по RECIPE_MATCH_LIMIT подобранных рецептов проверяется
+# остальными фильтрами запроса; более слабые совпадения отбрасываются.
+RECIPE_MATCH_MAX_BATCHES = int(
+    os.getenv('RECIPE_MATCH_MAX_BATCHES', default=4)
+)
+
+SHORT_URL_MIN_LENGTH = 6
+
+SHORT_URL_CACHE_TIMEOUT = int(os.getenv('SHORT_URL_CACHE_TIMEOUT', default=86400))
+
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', default=86400))
+
+CATALOG_MAX_AGE = int(os.getenv('CATALOG_MAX_AGE', default=60))
+
+RECIPE_DETAIL_CACHE_TIMEOUT = int(
+    os.getenv('RECIPE_DETAIL_CACHE_TIMEOUT', default=3600)
+)
+
+MEMBERSHIP_CACHE_TIMEOUT = int(
+    os.getenv('MEMBERSHIP_CACHE_TIMEOUT', default=3600)
+)
+
+TOKEN_CACHE_TIMEOUT = int(os.getenv('TOKEN_CACHE_TIMEOUT', default=300))
+
+TOKEN_CACHE_MAX_ENTRIES = int(
+    os.getenv('TOKEN_CACHE_MAX_ENTRIES', default=10000)
+)
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.getenv('SECRET_KEY', default='token')
 
 DEBUG = os.environ.get('DEBUG', default='false').lower() == 'true'
 
+# Асинхронные представления для чтения под ASGI. Выключены по умолчанию:
+# по замеру benchmark_servers они пока уступают WSGI.
+ASYNC_READ_VIEWS = os.getenv(
+    'ASYNC_READ_VIEWS', default='false'
+).lower() == 'true'
+
 ALLOWED_HOSTS = [host.strip() for host in
                  os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')]
 
@@ -34,6 +77,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.middleware.MetricsMiddleware",
+    "api.middleware.ReplicaMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -74,6 +119,80 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения: имена файлов для SQLite или host[:port].
+DATABASE_REPLICAS = []
+
+for number, location in enumerate(filter(None, (
+    location.strip()
+    for location in os.getenv("DB_REPLICAS", default="").split(",")
+))):
+    replica = dict(DATABASES["default"], TEST={"MIRROR": "default"})
+    if replica["ENGINE"].endswith("sqlite3"):
+        replica["NAME"] = location
+    else:
+        host, _, port = location.partition(":")
+        replica.update(HOST=host, PORT=port or replica["PORT"])
+    DATABASES[f"replica_{number}"] = replica
+    DATABASE_REPLICAS.append(f"replica_{number}")
+
+DATABASE_ROUTERS = ["api.replicas.ReplicaRouter"]
+
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", default=10))
+
+REPLICA_HEALTH_INTERVAL = int(os.getenv("REPLICA_HEALTH_INTERVAL", default=5))
+
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", default=5))
+
+CACHE_BACKEND = os.getenv(
+    "CACHE_BACKEND",
+    default="django.core.cache.backends.memcached.PyMemcacheCache"
+)
+
+CACHE_LOCATION = os.getenv("CACHE_LOCATION", default="fg_cache:11211")
+
+# Локальный кэш у каждого процесса свой: сброс из других процессов
+# и из команд manage.py до него не доходит.
+CACHE_IS_SHARED = not CACHE_BACKEND.endswith(("LocMemCache", "DummyCache"))
+
+LOCAL_CACHE_MAX_TIMEOUT = int(
+    os.getenv("LOCAL_CACHE_MAX_TIMEOUT", default=60)
+)
+
+if not CACHE_IS_SHARED:
+    CATALOG_CACHE_TIMEOUT = min(CATALOG_CACHE_TIMEOUT, LOCAL_CACHE_MAX_TIMEOUT)
+    SHORT_URL_CACHE_TIMEOUT = min(
+        SHORT_URL_CACHE_TIMEOUT, LOCAL_CACHE_MAX_TIMEOUT
+    )
+    MEMBERSHIP_CACHE_TIMEOUT = min(
+        MEMBERSHIP_CACHE_TIMEOUT, LOCAL_CACHE_MAX_TIMEOUT
+    )
+    RECIPE_DETAIL_CACHE_TIMEOUT = min(
+        RECIPE_DETAIL_CACHE_TIMEOUT, LOCAL_CACHE_MAX_TIMEOUT
+    )
+    RECIPE_INGREDIENT_INDEX_TTL = min(
+        RECIPE_INGREDIENT_INDEX_TTL, LOCAL_CACHE_MAX_TIMEOUT
+    )
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": CACHE_LOCATION,
+    },
+    "tokens": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": os.getenv(
+            "TOKEN_CACHE_LOCATION", default=CACHE_LOCATION
+        ),
+        "KEY_PREFIX": "tokens",
+        "TIMEOUT": TOKEN_CACHE_TIMEOUT,
+        # Ограничение размера поддерживают только локальные бэкенды.
+        "OPTIONS": (
+            {"MAX_ENTRIES": TOKEN_CACHE_MAX_ENTRIES}
+            if CACHE_BACKEND.endswith("LocMemCache") else {}
+        ),
+    },
+}
+
 # сервисная часть
 # DATABASES = {
 #    'default': {
@@ -119,15 +238,47 @@ MEDIA_URL = "/media/"
 
 MEDIA_ROOT = BASE_DIR / "media"
 
+DEFAULT_FILE_STORAGE = "api.storage.ContentAddressedStorage"
+
+IMAGE_VARIANT_WIDTHS = (320, 640)
+
+IMAGE_VARIANTS_CACHE_TIMEOUT = int(
+    os.getenv("IMAGE_VARIANTS_CACHE_TIMEOUT", default=86400)
+)
+
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", default=2))
+
+MAX_IMAGE_UPLOAD_SIZE = int(os.getenv("MAX_IMAGE_UPLOAD_SIZE", default=5 * 1024 * 1024))
+
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv("FEED_FANOUT_MAX_FOLLOWERS", default=1000))
+
 AUTH_USER_MODEL = "users.FoodgramUser"
 
+API_RENDERERS = [
+    "api.renderers.ORJSONRenderer",
+    "rest_framework.renderers.BrowsableAPIRenderer",
+]
+
+API_PARSERS = [
+    "api.parsers.ORJSONParser",
+    "rest_framework.parsers.FormParser",
+    "rest_framework.parsers.MultiPartParser",
+]
+
+# MessagePack отдаётся только по Accept и только при установленном msgpack.
+if find_spec("msgpack"):
+    API_RENDERERS.append("api.renderers.MessagePackRenderer")
+    API_PARSERS.append("api.parsers.MessagePackParser")
+
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
+    "DEFAULT_RENDERER_CLASSES": API_RENDERERS,
+    "DEFAULT_PARSER_CLASSES": API_PARSERS,
     "SEARCH_PARAM": "name",
     "DEFAULT_PAGINATION_CLASS": "api.pagination.LimitPagination",
     "PAGE_SIZE": PAGE_SIZE,
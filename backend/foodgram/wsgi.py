@@ -5,3 +5,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
 application = get_wsgi_application()
+
+from recipes.ingredient_index import ingredient_index  # noqa: E402
+from recipes.ingredient_matching import (  # noqa: E402
+    recipe_ingredient_index
+)
+
+ingredient_index.warm()
+recipe_ingredient_index.warm()
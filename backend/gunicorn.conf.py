@@ -0,0 +1,19 @@
+import os
+import shutil
+
+# Каталог должен быть задан до импорта prometheus_client в процессах.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/foodgram-metrics')
+
+
+def on_starting(server):
+    """Очистка показателей процессов предыдущего запуска."""
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+
+def child_exit(server, worker):
+    """Удаление показателей завершившегося процесса."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -42,7 +42,8 @@ class TagsInLine(admin.StackedInline):
 class RecipeAdmin(admin.ModelAdmin):
     """Рецепты."""
 
-    list_display = ('id', 'name', 'author', 'pub_date', 'text')
+    list_display = ('id', 'name', 'author', 'pub_date', 'text',
+                    'favorites_count', 'shopping_cart_count')
     list_display_links = ('id', 'name', 'author')
     search_fields = ('name', 'author__username')
     list_filter = ('tags',)
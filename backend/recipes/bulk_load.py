@@ -0,0 +1,354 @@
+import csv
+import io
+import json
+import re
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from recipes.feed import fan_out_recipes
+from recipes.ingredient_matching import recipe_ingredient_index
+from recipes.models import (Ingredient, IngredientRecipe, Recipe, Tag,
+                            free_tag_bit)
+from recipes.short_links import encode_short_url
+
+JSON_CHUNK_SIZE = 64 * 1024
+JSON_SEPARATORS = re.compile(r'[\s,]*')
+
+User = get_user_model()
+
+
+def read_csv(file, fieldnames):
+    """Потоковое чтение CSV; строка заголовка пропускается."""
+    for row in csv.DictReader(file, fieldnames=fieldnames):
+        if [row[name] for name in fieldnames] != list(fieldnames):
+            yield row
+
+
+def read_ndjson(file):
+    """Потоковое чтение JSON Lines."""
+    for line in file:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def read_json(file):
+    """Потоковое чтение JSON-массива объектов без загрузки файла целиком."""
+    decoder = json.JSONDecoder()
+    buffer, position, opened, eof = '', 0, False, False
+    while True:
+        position = JSON_SEPARATORS.match(buffer, position).end()
+        if position < len(buffer):
+            if not opened:
+                if buffer[position] != '[':
+                    raise ValueError('Ожидается JSON-массив.')
+                opened = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                row, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield row
+                continue
+        elif eof:
+            raise ValueError('Неожиданный конец JSON-массива.')
+        chunk = file.read(JSON_CHUNK_SIZE)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+    'ndjson': read_ndjson,
+}
+
+
+def batched(rows, size):
+    """Разбиение потока строк на пакеты."""
+    rows = iter(rows)
+    batch = list(islice(rows, size))
+    while batch:
+        yield batch
+        batch = list(islice(rows, size))
+
+
+def copy_available():
+    """Доступна ли загрузка через COPY."""
+    return connection.vendor == 'postgresql'
+
+
+def copy_upsert(model, objects, conflict_fields, update_fields):
+    """Загрузка пакета через COPY и INSERT ... ON CONFLICT.
+
+    Строки копируются во временную таблицу, откуда одним запросом
+    переносятся в основную с обновлением или пропуском конфликтов.
+    """
+    quote = connection.ops.quote_name
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    for obj in objects:
+        writer.writerow([
+            field.get_db_prep_save(field.pre_save(obj, True), connection)
+            for field in fields
+        ])
+    buffer.seek(0)
+
+    table = quote(model._meta.db_table)
+    staging = quote(f'staging_{model._meta.db_table}')
+    columns = ', '.join(quote(field.column) for field in fields)
+    conflict = ', '.join(
+        quote(model._meta.get_field(name).column) for name in conflict_fields
+    )
+    if update_fields:
+        action = 'DO UPDATE SET ' + ', '.join(
+            '{0} = EXCLUDED.{0}'.format(
+                quote(model._meta.get_field(name).column)
+            )
+            for name in update_fields
+        )
+    else:
+        action = 'DO NOTHING'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMP TABLE {staging} ON COMMIT DROP AS '
+            f'SELECT {columns} FROM {table} WITH NO DATA'
+        )
+        cursor.copy_expert(
+            f'COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv)',
+            buffer
+        )
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) '
+            f'SELECT {columns} FROM {staging} '
+            f'ON CONFLICT ({conflict}) {action}'
+        )
+        return cursor.rowcount
+
+
+class FlatLoader:
+    """Загрузчик моделей без связей многие-ко-многим."""
+
+    def __init__(self, model, fieldnames, conflict_fields, update_fields=()):
+        self.model = model
+        self.fieldnames = fieldnames
+        self.conflict_fields = conflict_fields
+        self.update_fields = update_fields
+
+    def build(self, row):
+        """Объект модели из строки файла."""
+        return self.model(**{name: row[name] for name in self.fieldnames})
+
+    def stored_keys(self, objects):
+        """Ключи конфликта объектов пакета, которые есть в базе."""
+        first = self.conflict_fields[0]
+        return set(self.model.objects.filter(**{
+            f'{first}__in': {getattr(obj, first) for obj in objects}
+        }).values_list(*self.conflict_fields))
+
+    def load(self, rows, use_copy):
+        """Загрузка пакета строк; возвращает число записанных строк.
+
+        Строки, пропущенные из-за конфликтов, не учитываются: без COPY
+        записанными считаются ключи, которых не было в базе до вставки
+        и которые появились после неё.
+        """
+        objects = [self.build(row) for row in rows]
+        if use_copy:
+            return copy_upsert(
+                self.model, objects, self.conflict_fields, self.update_fields
+            )
+        with transaction.atomic():
+            before = self.stored_keys(objects)
+            self.model.objects.bulk_create(objects, ignore_conflicts=True)
+            return len(self.stored_keys(objects) - before)
+
+
+class UserLoader(FlatLoader):
+    """Загрузчик пользователей с хешированием паролей."""
+
+    def __init__(self):
+        super().__init__(
+            User,
+            ('email', 'username', 'first_name', 'last_name', 'password'),
+            ('email',),
+            ('username', 'first_name', 'last_name')
+        )
+        self.hashes = {}
+
+    def build(self, row):
+        user = super().build(row)
+        try:
+            identify_hasher(user.password)
+        except ValueError:
+            if user.password not in self.hashes:
+                self.hashes[user.password] = make_password(user.password)
+            user.password = self.hashes[user.password]
+        return user
+
+
+class TagLoader(FlatLoader):
+    """Загрузчик тегов с назначением битов маски.
+
+    Существующий тег сохраняет свой бит, новый получает свободный,
+    как при Tag.save; тегов не может быть больше MAX_TAGS.
+    """
+
+    def __init__(self):
+        super().__init__(Tag, ('name', 'slug'), ('slug',), ('name',))
+        self.bits = dict(Tag.objects.values_list('slug', 'bit'))
+
+    def build(self, row):
+        tag = super().build(row)
+        if tag.slug not in self.bits:
+            self.bits[tag.slug] = free_tag_bit(set(self.bits.values()))
+        tag.bit = self.bits[tag.slug]
+        return tag
+
+
+class RecipeLoader:
+    """Загрузчик рецептов вместе с тегами и ингредиентами.
+
+    Автор задаётся email, теги - списком слагов, ингредиенты -
+    списком объектов с name, measurement_unit и amount.
+    """
+
+    fieldnames = None
+
+    def __init__(self):
+        self.tags = {tag.slug: tag for tag in Tag.objects.all()}
+        self.ingredients = {
+            (name, unit): pk for pk, name, unit
+            in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        }
+
+    @staticmethod
+    def lookup(mapping, key, row, missing):
+        """Значение из справочника или ошибка с названием рецепта."""
+        value = mapping.get(key)
+        if value is None:
+            raise ValidationError(
+                f'Рецепт «{row.get("name")}»: {missing} не найден.'
+            )
+        return value
+
+    def tag(self, row, slug):
+        return self.lookup(self.tags, slug, row, f'тег {slug}')
+
+    def ingredient_id(self, row, item):
+        key = (item['name'], item['measurement_unit'])
+        return self.lookup(
+            self.ingredients, key, row, f'ингредиент {key[0]} ({key[1]})'
+        )
+
+    def build(self, row, authors):
+        return Recipe(
+            author_id=self.lookup(
+                authors, row['author'], row, f'автор {row["author"]}'
+            ),
+            name=row['name'],
+            text=row['text'],
+            cooking_time=row['cooking_time'],
+            image=row.get('image', ''),
+            tag_mask=sum(
+                self.tag(row, slug).mask for slug in set(row.get('tags', ()))
+            ),
+        )
+
+    def insert(self, recipes):
+        """Вставка рецептов одним запросом с получением их id.
+
+        Возвращает False, если база данных не сообщает id новых строк.
+        SQLite выполняет записи последовательно, поэтому в транзакции
+        id пакета - последние id таблицы.
+        """
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes)
+            return True
+        if connection.vendor != 'sqlite':
+            return False
+        Recipe.objects.bulk_create(recipes)
+        ids = Recipe.objects.order_by('-id').values_list(
+            'id', flat=True
+        )[:len(recipes)]
+        for recipe, pk in zip(recipes, list(ids)[::-1]):
+            recipe.id = pk
+        return True
+
+    @transaction.atomic
+    def load(self, rows, use_copy):
+        authors = dict(User.objects.filter(
+            email__in={row['author'] for row in rows}
+        ).values_list('email', 'id'))
+        recipes = [self.build(row, authors) for row in rows]
+        if self.insert(recipes):
+            update_fields = ['short_url']
+            if any('pub_date' in row for row in rows):
+                update_fields.append('pub_date')
+            for recipe, row in zip(recipes, rows):
+                recipe.short_url = encode_short_url(recipe.id)
+                recipe.pub_date = row.get('pub_date', recipe.pub_date)
+            Recipe.objects.bulk_update(recipes, update_fields)
+            fan_out_recipes(recipes)
+        else:
+            for recipe, row in zip(recipes, rows):
+                recipe.save()
+                if 'pub_date' in row:
+                    recipe.pub_date = row['pub_date']
+                    recipe.save(update_fields=('pub_date',))
+        tag_links = []
+        ingredient_links = []
+        TagLink = Recipe.tags.through
+        for recipe, row in zip(recipes, rows):
+            tag_links.extend(
+                TagLink(recipe_id=recipe.id, tag_id=self.tag(row, slug).id)
+                for slug in set(row.get('tags', ()))
+            )
+            ingredient_links.extend(
+                IngredientRecipe(
+                    recipe_id=recipe.id,
+                    ingredient_id=self.ingredient_id(row, item),
+                    amount=item['amount']
+                )
+                for item in row.get('ingredients', ())
+            )
+        TagLink.objects.bulk_create(tag_links)
+        IngredientRecipe.objects.bulk_create(ingredient_links)
+        recipe_ids = [recipe.id for recipe in recipes]
+        transaction.on_commit(
+            lambda: recipe_ingredient_index.changed(recipe_ids)
+        )
+        return len(recipes)
+
+
+def get_loader(name):
+    """Загрузчик по названию набора данных."""
+    if name == 'ingredients':
+        return FlatLoader(
+            Ingredient, ('name', 'measurement_unit'),
+            ('name', 'measurement_unit')
+        )
+    if name == 'tags':
+        return TagLoader()
+    if name == 'users':
+        return UserLoader()
+    return RecipeLoader()
+
+
+LOADERS = ('ingredients', 'tags', 'users', 'recipes')
@@ -0,0 +1,29 @@
+import time
+
+from django.core.cache import cache
+
+try:
+    from pymemcache.exceptions import MemcacheError
+except ImportError:
+    MemcacheError = OSError
+
+CATALOG_VERSION_KEY = 'catalog_version'
+# Ошибки клиента кэша: сервер недоступен или отвечает с ошибкой.
+CACHE_ERRORS = (OSError, MemcacheError)
+
+
+def get_catalog_version():
+    """Текущая версия справочников тегов и ингредиентов."""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Смена версии справочников после их изменения."""
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
@@ -0,0 +1,41 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def change_counter(queryset, field, delta):
+    """Атомарное изменение счётчика на стороне базы данных."""
+    queryset.update(**{field: Greatest(F(field) + delta, Value(0))})
+
+
+def count_subquery(model, field):
+    """Подзапрос с количеством строк model, ссылающихся на объект."""
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(total=Count('pk')).values('total')
+    ), Value(0))
+
+
+class CountersMixin:
+    """Модель со счётчиками, которые меняет только change_counter.
+
+    Сохранение существующего объекта без update_fields не записывает
+    счётчики: значения, прочитанные в начале запроса, затёрли бы
+    одновременные атомарные изменения.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and not args
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
@@ -0,0 +1,33 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from recipes.catalog import get_catalog_version
+from recipes.models import Recipe
+
+
+def recipe_detail_key(pk):
+    """Ключ кэша рецепта; смена версии справочников сбрасывает все ключи."""
+    return f'recipes:detail:{get_catalog_version()}:{int(pk)}'
+
+
+def forget_recipe_details(pks):
+    """Удаление рецептов из кэша сразу и после фиксации транзакции.
+
+    Повторное удаление убирает ответ, который другой запрос мог
+    сохранить по данным, прочитанным до фиксации.
+    """
+    keys = [recipe_detail_key(pk) for pk in pks]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def author_recipe_ids(author_id):
+    return list(Recipe.objects.filter(
+        author_id=author_id
+    ).values_list('pk', flat=True))
+
+
+def forget_author_recipe_details(author_id):
+    """Удаление из кэша всех рецептов автора после изменения профиля."""
+    forget_recipe_details(author_recipe_ids(author_id))
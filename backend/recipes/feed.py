@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from recipes.models import FeedEntry, Recipe, keyset_filter
+from users.models import Follow
+
+FEED_BATCH_SIZE = 500
+
+User = get_user_model()
+
+FAN_OUT_SQL = (
+    f'INSERT INTO {FeedEntry._meta.db_table} (user_id, recipe_id, pub_date) '
+    f'SELECT follow.user_id, recipe.id, recipe.pub_date '
+    f'FROM {Recipe._meta.db_table} AS recipe '
+    f'JOIN {Follow._meta.db_table} AS follow '
+    f'ON follow.author_id = recipe.author_id '
+    f'JOIN {User._meta.db_table} AS author ON author.id = recipe.author_id '
+    'WHERE recipe.id IN ({ids}) AND author.followers_count <= %s '
+    'ON CONFLICT (user_id, recipe_id) DO NOTHING'
+)
+BACKFILL_SQL = (
+    f'INSERT INTO {FeedEntry._meta.db_table} (user_id, recipe_id, pub_date) '
+    f'SELECT follow.user_id, recipe.id, recipe.pub_date '
+    f'FROM {Recipe._meta.db_table} AS recipe '
+    f'JOIN {Follow._meta.db_table} AS follow '
+    f'ON follow.author_id = recipe.author_id '
+    'WHERE recipe.author_id = %s '
+    'ON CONFLICT (user_id, recipe_id) DO NOTHING'
+)
+
+
+def fanout_authors(author_ids):
+    """Авторы, рецепты которых раскладываются по лентам при публикации.
+
+    Рецепты авторов с большим числом подписчиков в ленты не
+    записываются и подмешиваются при чтении.
+    """
+    return set(User.objects.filter(
+        pk__in=author_ids,
+        followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).values_list('id', flat=True))
+
+
+def fan_out_recipes(recipes):
+    """Запись новых рецептов в ленты подписчиков их авторов.
+
+    Записи создаются одним запросом INSERT ... SELECT на пакет
+    рецептов, без создания объектов в Python.
+    """
+    ids = [recipe.id for recipe in recipes]
+    for start in range(0, len(ids), FEED_BATCH_SIZE):
+        batch = ids[start:start + FEED_BATCH_SIZE]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                FAN_OUT_SQL.format(ids=', '.join(['%s'] * len(batch))),
+                (*batch, settings.FEED_FANOUT_MAX_FOLLOWERS)
+            )
+
+
+def fill_feed(user_id, author_id):
+    """Запись рецептов автора в ленту нового подписчика."""
+    if author_id not in fanout_authors((author_id,)):
+        return
+    recipes = Recipe.objects.filter(author_id=author_id).values_list(
+        'id', 'pub_date'
+    ).iterator()
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, recipe_id=pk, pub_date=pub_date)
+            for pk, pub_date in recipes
+        ),
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def backfill_feeds(author_id):
+    """Запись всех рецептов автора в ленты его подписчиков.
+
+    Нужна, когда число подписчиков автора опускается до порога
+    FEED_FANOUT_MAX_FOLLOWERS: рецепты, опубликованные, пока он был
+    выше порога, в ленты не записывались, а при чтении его рецепты
+    больше не подмешиваются.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(BACKFILL_SQL, (author_id,))
+
+
+def clear_feed(user_id, author_id):
+    """Удаление рецептов автора из ленты после отписки."""
+    FeedEntry.objects.filter(
+        user_id=user_id, recipe__author_id=author_id
+    ).delete()
+
+
+def feed_positions(user, position, reverse, size):
+    """Позиции (pub_date, id) страницы ленты пользователя.
+
+    Записи ленты читаются одним диапазонным запросом по индексу,
+    рецепты авторов с большим числом подписчиков - отдельным
+    запросом, после чего обе выборки сливаются.
+    """
+    entries = keyset_filter(
+        FeedEntry.objects.filter(user=user),
+        position, reverse, 'pub_date', 'recipe_id'
+    ).values_list('pub_date', 'recipe_id')[:size]
+    popular = keyset_filter(
+        Recipe.objects.filter(author__in=Follow.objects.filter(
+            user=user,
+            author__followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+        ).values('author')),
+        position, reverse, 'pub_date', 'id'
+    ).values_list('pub_date', 'id')[:size]
+    positions = sorted(
+        set(entries) | set(popular), reverse=not reverse
+    )
+    return positions[:size]
@@ -0,0 +1,138 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+VARIANT_FORMATS = (
+    ('jpg', 'JPEG'),
+    ('webp', 'WEBP'),
+    ('avif', 'AVIF'),
+)
+
+# Время кэширования списка копий, пока созданы ещё не все.
+PENDING_VARIANTS_TIMEOUT = 60
+
+_executor = None
+
+
+def available_formats():
+    """Форматы уменьшенных копий, которые умеет сохранять Pillow."""
+    Image.init()
+    return [
+        (ext, image_format) for ext, image_format in VARIANT_FORMATS
+        if image_format in Image.SAVE
+    ]
+
+
+def variant_name(name, width, ext):
+    """Имя уменьшенной копии изображения в хранилище."""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join('variants', directory, f'{stem}_{width}.{ext}')
+
+
+def variant_names(name):
+    """Имена всех копий изображения по ширине и формату."""
+    formats = available_formats()
+    return {
+        width: {ext: variant_name(name, width, ext) for ext, _ in formats}
+        for width in settings.IMAGE_VARIANT_WIDTHS
+    }
+
+
+def stored_variants_key(name):
+    return 'image_variants:' + hashlib.md5(name.encode()).hexdigest()
+
+
+def stored_variants(name):
+    """Имена копий изображения, которые уже есть в хранилище.
+
+    Полный набор копий кэшируется надолго, неполный - на
+    PENDING_VARIANTS_TIMEOUT секунд, пока копии создаются в пуле.
+    """
+    key = stored_variants_key(name)
+    variants = cache.get(key)
+    if variants is None:
+        names = variant_names(name)
+        variants = {
+            width: {
+                ext: variant for ext, variant in formats.items()
+                if default_storage.exists(variant)
+            }
+            for width, formats in names.items()
+        }
+        complete = variants == names
+        cache.set(
+            key, variants,
+            settings.IMAGE_VARIANTS_CACHE_TIMEOUT if complete
+            else PENDING_VARIANTS_TIMEOUT
+        )
+    return variants
+
+
+def generate_variants(name):
+    """Создание недостающих копий изображения; возвращает их число."""
+    created = 0
+    try:
+        with default_storage.open(name) as file, Image.open(file) as image:
+            for width, names in variant_names(name).items():
+                resized = None
+                for ext, image_format in available_formats():
+                    if default_storage.exists(names[ext]):
+                        continue
+                    if resized is None:
+                        resized = image.convert(
+                            'RGBA' if 'A' in image.getbands() else 'RGB'
+                        )
+                        resized.thumbnail((width, resized.height))
+                    output = resized
+                    if image_format == 'JPEG' and resized.mode != 'RGB':
+                        output = resized.convert('RGB')
+                    buffer = BytesIO()
+                    output.save(buffer, image_format)
+                    default_storage.save(
+                        names[ext], ContentFile(buffer.getvalue())
+                    )
+                    created += 1
+    except (OSError, ValueError) as error:
+        logger.warning('Копии изображения %s не созданы: %s', name, error)
+    return created
+
+
+def get_executor():
+    """Общий пул процессов для обработки изображений."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_VARIANT_WORKERS
+        )
+    return _executor
+
+
+def schedule_variants(name, on_done=None):
+    """Создание копий изображения в пуле процессов вне запроса.
+
+    После создания копий сбрасывается список копий в кэше и вызывается
+    on_done: им сбрасываются закэшированные ответы, где вместо копий
+    указано исходное изображение.
+    """
+    if not name:
+        return None
+
+    def done(_):
+        cache.delete(stored_variants_key(name))
+        if on_done is not None:
+            on_done()
+
+    future = get_executor().submit(generate_variants, name)
+    future.add_done_callback(done)
+    return future
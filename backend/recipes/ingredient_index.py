@@ -0,0 +1,99 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from recipes.catalog import CACHE_ERRORS, get_catalog_version
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(value):
+    """Приведение строки к виду для поиска по префиксу."""
+    return value.casefold().replace('ё', 'е')
+
+
+class IngredientPrefixIndex:
+    """Индекс ингредиентов в памяти процесса для поиска по префиксу.
+
+    Хранит отсортированный массив нормализованных названий и готовые
+    представления ингредиентов. Поиск выполняется бинарным поиском
+    без обращения к базе данных. Индекс перестраивается при смене
+    версии справочников или по истечении ttl.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = None
+        self._built_at = 0
+        self._version = None
+
+    def build(self):
+        """Загрузка ингредиентов из базы данных."""
+        from recipes.models import Ingredient
+
+        version = get_catalog_version()
+        rows = sorted(
+            (normalize(name), name, pk, measurement_unit)
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            ).iterator()
+        )
+        keys = [row[0] for row in rows]
+        items = [
+            {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+            for _, name, pk, measurement_unit in rows
+        ]
+        with self._lock:
+            self._data = (keys, items)
+            self._built_at = time.monotonic()
+            self._version = version
+
+    def warm(self):
+        """Построение индекса при старте процесса.
+
+        Недоступные база данных или кэш не мешают запуску: индекс
+        будет построен при первом обращении.
+        """
+        try:
+            self.build()
+        except (DatabaseError, *CACHE_ERRORS) as error:
+            logger.warning('Индекс не построен при запуске: %s', error)
+
+    def invalidate(self):
+        """Сброс индекса; он будет перестроен при следующем поиске."""
+        with self._lock:
+            self._data = None
+
+    def _get_data(self):
+        data = self._data
+        if (
+            data is None
+            or self._version != get_catalog_version()
+            or time.monotonic() - self._built_at > self.ttl
+        ):
+            self.build()
+            data = self._data
+        return data
+
+    def search(self, prefix='', limit=None):
+        """Ингредиенты, название которых начинается с prefix."""
+        keys, items = self._get_data()
+        prefix = normalize(prefix)
+        result = []
+        for index in range(bisect_left(keys, prefix), len(keys)):
+            if limit is not None and len(result) >= limit:
+                break
+            if not keys[index].startswith(prefix):
+                break
+            result.append(items[index])
+        return result
+
+
+ingredient_index = IngredientPrefixIndex(
+    ttl=getattr(settings, 'INGREDIENT_INDEX_TTL', 300)
+)
@@ -0,0 +1,227 @@
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+from django.db.models import Case, IntegerField, Value, When
+
+from recipes.catalog import CACHE_ERRORS
+from recipes.search import SEARCH_RANK
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'recipe_ingredients_version'
+CHANGES_KEY = 'recipe_ingredients_changes:{}'
+MAX_PENDING_CHANGES = 100
+MISSING_WEIGHT = 1000
+
+
+def get_version():
+    """Номер последнего изменения состава рецептов."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 0, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def publish_changes(recipe_ids):
+    """Запись изменённых рецептов в журнал; возвращает номер изменения."""
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 0, timeout=None)
+        version = cache.incr(VERSION_KEY)
+    cache.set(CHANGES_KEY.format(version), list(recipe_ids))
+    return version
+
+
+class RecipeIngredientIndex:
+    """Инвертированный индекс ингредиентов рецептов в памяти процесса.
+
+    Для каждого ингредиента хранится отсортированный массив id
+    рецептов, для каждого рецепта - его ингредиенты. Изменения
+    рецептов записываются в журнал в кеше и применяются к индексу
+    точечно; при отставании от журнала и по истечении ttl индекс
+    строится заново. Состав читается с основной базы: реплика может
+    отставать от журнала.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._postings = None
+        self._recipes = None
+        self._built_at = 0
+        self._version = None
+
+    def build(self):
+        """Загрузка состава всех рецептов из базы данных."""
+        from recipes.models import IngredientRecipe
+
+        version = get_version()
+        recipes = defaultdict(list)
+        postings = defaultdict(lambda: array('l'))
+        rows = IngredientRecipe.objects.using(DEFAULT_DB_ALIAS).order_by(
+            'recipe_id'
+        ).values_list('recipe_id', 'ingredient_id')
+        for recipe_id, ingredient_id in rows.iterator():
+            recipes[recipe_id].append(ingredient_id)
+            postings[ingredient_id].append(recipe_id)
+        with self._lock:
+            self._recipes = {
+                recipe_id: frozenset(ingredients)
+                for recipe_id, ingredients in recipes.items()
+            }
+            self._postings = dict(postings)
+            self._built_at = time.monotonic()
+            self._version = version
+
+    def warm(self):
+        """Построение индекса при старте процесса.
+
+        Недоступные база данных или кэш не мешают запуску: индекс
+        будет построен при первом обращении.
+        """
+        try:
+            self.build()
+        except (DatabaseError, *CACHE_ERRORS) as error:
+            logger.warning('Индекс не построен при запуске: %s', error)
+
+    def _load(self, recipe_ids):
+        from recipes.models import IngredientRecipe
+
+        recipes = {recipe_id: set() for recipe_id in recipe_ids}
+        for recipe_id, ingredient_id in IngredientRecipe.objects.using(
+            DEFAULT_DB_ALIAS
+        ).filter(recipe_id__in=recipe_ids).values_list(
+            'recipe_id', 'ingredient_id'
+        ):
+            recipes[recipe_id].add(ingredient_id)
+        return recipes
+
+    def _apply(self, recipes):
+        for recipe_id, ingredients in recipes.items():
+            old = self._recipes.pop(recipe_id, frozenset())
+            for ingredient_id in old - ingredients:
+                posting = self._postings[ingredient_id]
+                index = bisect_left(posting, recipe_id)
+                if index < len(posting) and posting[index] == recipe_id:
+                    del posting[index]
+            for ingredient_id in ingredients - old:
+                insort(
+                    self._postings.setdefault(ingredient_id, array('l')),
+                    recipe_id
+                )
+            if ingredients:
+                self._recipes[recipe_id] = frozenset(ingredients)
+
+    def changed(self, recipe_ids):
+        """Учёт изменения состава рецептов в индексе и журнале."""
+        recipe_ids = list(recipe_ids)
+        version = publish_changes(recipe_ids)
+        if self._postings is None or self._version != version - 1:
+            return
+        recipes = self._load(recipe_ids)
+        with self._lock:
+            self._apply(recipes)
+            self._version = version
+
+    def _sync(self):
+        if (
+            self._postings is None
+            or time.monotonic() - self._built_at > self.ttl
+        ):
+            return self.build()
+        version = get_version()
+        if version == self._version:
+            return
+        if not self._version < version <= (
+            self._version + MAX_PENDING_CHANGES
+        ):
+            return self.build()
+        changes = cache.get_many([
+            CHANGES_KEY.format(number)
+            for number in range(self._version + 1, version + 1)
+        ])
+        if len(changes) != version - self._version:
+            return self.build()
+        recipes = self._load({
+            recipe_id for recipe_ids in changes.values()
+            for recipe_id in recipe_ids
+        })
+        with self._lock:
+            self._apply(recipes)
+            self._version = version
+
+    def match(self, have, exclude=(), max_missing=0, limit=None):
+        """Рецепты, которые можно приготовить из ингредиентов have.
+
+        Рецепт подходит, если в нём нет ингредиентов из exclude и
+        недостаёт не более max_missing ингредиентов. Возвращает
+        кортежи (id рецепта, недостаёт, совпало), сначала рецепты
+        с меньшим числом недостающих и большим числом совпавших
+        ингредиентов.
+        """
+        self._sync()
+        with self._lock:
+            matched = Counter()
+            for ingredient_id in set(have):
+                matched.update(self._postings.get(ingredient_id, ()))
+            excluded = set()
+            for ingredient_id in set(exclude):
+                excluded.update(self._postings.get(ingredient_id, ()))
+            result = []
+            for recipe_id, count in matched.items():
+                missing = len(self._recipes[recipe_id]) - count
+                if missing <= max_missing and recipe_id not in excluded:
+                    result.append((recipe_id, missing, count))
+        result.sort(key=lambda item: (item[1], -item[2], -item[0]))
+        return result[:limit]
+
+
+recipe_ingredient_index = RecipeIngredientIndex(
+    ttl=getattr(settings, 'RECIPE_INGREDIENT_INDEX_TTL', 3600)
+)
+
+
+def match_ingredients(queryset, have, exclude=(), max_missing=0):
+    """Рецепты из ингредиентов have по убыванию полноты совпадения.
+
+    Подбор выполняется по индексу в памяти, база данных проверяет
+    id подобранных рецептов пачками по RECIPE_MATCH_LIMIT, пока
+    остальным фильтрам queryset не ответят RECIPE_MATCH_LIMIT
+    лучших рецептов. Пачек не больше RECIPE_MATCH_MAX_BATCHES, то есть
+    и запросов на проверку; рецепты за их пределами не выдаются.
+    """
+    limit = settings.RECIPE_MATCH_LIMIT
+    ranked = recipe_ingredient_index.match(
+        have, exclude, max_missing, limit * settings.RECIPE_MATCH_MAX_BATCHES
+    )
+    groups = defaultdict(list)
+    found = 0
+    for start in range(0, len(ranked), limit):
+        chunk = ranked[start:start + limit]
+        allowed = set(queryset.filter(
+            id__in=[recipe_id for recipe_id, _, _ in chunk]
+        ).values_list('id', flat=True))
+        for recipe_id, missing, matched in chunk:
+            if recipe_id in allowed and found < limit:
+                groups[matched - missing * MISSING_WEIGHT].append(recipe_id)
+                found += 1
+        if found >= limit:
+            break
+    if not groups:
+        return queryset.none()
+    return queryset.filter(
+        id__in=[pk for recipe_ids in groups.values() for pk in recipe_ids]
+    ).annotate(**{SEARCH_RANK: Case(
+        *(When(id__in=recipe_ids, then=Value(score))
+          for score, recipe_ids in groups.items()),
+        output_field=IntegerField()
+    )}).order_by(f'-{SEARCH_RANK}', '-pub_date', '-id')
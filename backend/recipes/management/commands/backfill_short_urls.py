@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from recipes.models import Recipe
+from recipes.short_links import encode_short_url
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    """Заполнение коротких ссылок рецептов."""
+
+    help = 'Заполнение пустых и устаревших коротких ссылок рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        """Обход рецептов пакетами по id."""
+        batch_size = options['batch_size']
+        last_id = 0
+        updated = 0
+        while True:
+            batch = list(
+                Recipe.objects.filter(id__gt=last_id).order_by('id').only(
+                    'id', 'short_url', 'legacy_short_url'
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            changed = []
+            for recipe in batch:
+                code = encode_short_url(recipe.id)
+                if recipe.short_url == code:
+                    continue
+                if recipe.short_url and not recipe.legacy_short_url:
+                    recipe.legacy_short_url = recipe.short_url
+                recipe.short_url = code
+                changed.append(recipe)
+            Recipe.objects.bulk_update(
+                changed, ('short_url', 'legacy_short_url')
+            )
+            updated += len(changed)
+        self.stdout.write(f'Обновлено коротких ссылок: {updated}.')
@@ -0,0 +1,80 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.benchmark import (ENDPOINTS, EndpointBenchmark, check_budgets,
+                           make_budgets)
+
+BUDGETS = os.path.join(settings.BASE_DIR, 'data/benchmark_budgets.json')
+
+
+class Command(BaseCommand):
+    """Замер производительности эндпоинтов API."""
+
+    help = (
+        'Замер задержки и числа SQL-запросов эндпоинтов API '
+        'и сравнение с бюджетами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--endpoint', action='append',
+            choices=[name for name, *_ in ENDPOINTS],
+            help='Замерить только указанные эндпоинты.'
+        )
+        parser.add_argument('--budgets', default=BUDGETS)
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимое превышение бюджета задержки, доля.'
+        )
+        parser.add_argument(
+            '--update-budgets', action='store_true',
+            help='Записать результаты как новые бюджеты.'
+        )
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+
+    def handle(self, *args, **options):
+        """Замер эндпоинтов и проверка бюджетов."""
+        if options['iterations'] < 2:
+            raise CommandError('Нужно не менее двух итераций.')
+        try:
+            benchmark = EndpointBenchmark(
+                options['iterations'], options['warmup']
+            )
+        except RuntimeError as error:
+            raise CommandError(error)
+        results = benchmark.run(options['endpoint'])
+        self.report(results)
+        if options['output']:
+            self.write_json(options['output'], results)
+        if options['update_budgets']:
+            self.write_json(options['budgets'], make_budgets(results))
+            return
+        with open(options['budgets'], encoding='utf-8') as file:
+            budgets = json.load(file)
+        errors = check_budgets(results, budgets, options['tolerance'])
+        if errors:
+            raise CommandError(
+                'Бюджеты превышены:\n' + '\n'.join(errors)
+            )
+        self.stdout.write('Бюджеты соблюдены.')
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"эндпоинт":<22}{"код":>5}{"SQL":>5}'
+            f'{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}'
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<22}{result["status"]:>5}{result["queries"]:>5}'
+                f'{result["p50_ms"]:>10}{result["p95_ms"]:>10}'
+                f'{result["p99_ms"]:>10}'
+            )
+
+    def write_json(self, path, data):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False, indent=2)
+            file.write('\n')
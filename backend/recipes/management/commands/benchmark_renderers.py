@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from api.renderer_benchmark import (FORMATS, RendererBenchmark,
+                                    available_formats)
+
+
+class Command(BaseCommand):
+    """Сравнение рендереров и парсеров API на данных из базы."""
+
+    help = (
+        'Замер отрисовки и разбора страницы рецептов, рецепта и списка '
+        'ингредиентов стандартным JSON DRF, orjson и MessagePack.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument(
+            '--page-size', type=int, default=100,
+            help='Количество рецептов на странице.'
+        )
+        parser.add_argument(
+            '--format', action='append', choices=list(FORMATS),
+            help='Замерить только указанные форматы.'
+        )
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+
+    def handle(self, *args, **options):
+        """Замер форматов и отчёт об ускорении."""
+        if options['iterations'] < 1:
+            raise CommandError('Нужна хотя бы одна итерация.')
+        formats = options['format'] or available_formats()
+        missing = set(formats) - set(available_formats())
+        if missing:
+            raise CommandError(
+                'Не установлены пакеты для форматов: '
+                + ', '.join(sorted(missing))
+            )
+        results = RendererBenchmark(
+            options['iterations'], options['page_size']
+        ).run(formats)
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+                file.write('\n')
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"данные":<15}{"формат":<10}{"байт":>10}'
+            f'{"отрисовка, мс":>15}{"ускорение":>11}'
+            f'{"разбор, мс":>12}{"ускорение":>11}'
+        )
+        for payload, rows in results.items():
+            for name, row in rows.items():
+                self.stdout.write(
+                    f'{payload:<15}{name:<10}{row["bytes"]:>10}'
+                    f'{row["render_ms"]:>15}{row["render_speedup"]:>11}'
+                    f'{row["parse_ms"]:>12}{row["parse_speedup"]:>11}'
+                )
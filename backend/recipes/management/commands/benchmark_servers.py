@@ -0,0 +1,85 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from api.server_benchmark import SERVERS, benchmark_servers, read_paths
+
+
+class Command(BaseCommand):
+    """Сравнение WSGI и ASGI на горячих эндпоинтах чтения."""
+
+    help = (
+        'Запуск gunicorn с синхронными процессами (WSGI) и с процессами '
+        'uvicorn (ASGI) и сравнение пропускной способности и задержек '
+        'при одновременных запросах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--server', action='append', choices=list(SERVERS),
+            help='Замерить только указанные серверы.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Количество процессов каждого сервера.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=100,
+            help='Количество одновременных клиентов.'
+        )
+        parser.add_argument(
+            '--duration', type=float, default=30,
+            help='Длительность замера каждого сервера, секунды.'
+        )
+        parser.add_argument(
+            '--warmup', type=float, default=5,
+            help='Неучитываемое время в начале замера, секунды.'
+        )
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+
+    def handle(self, *args, **options):
+        """Замер серверов по очереди и сравнение результатов."""
+        if options['workers'] < 1 or options['concurrency'] < 1:
+            raise CommandError(
+                'Нужны хотя бы один процесс и один клиент.'
+            )
+        paths = read_paths()
+        try:
+            results = benchmark_servers(
+                options['server'] or list(SERVERS),
+                paths,
+                options['workers'],
+                options['concurrency'],
+                options['duration'],
+                options['warmup'],
+                options['timeout'],
+            )
+        except RuntimeError as error:
+            raise CommandError(error)
+        self.report(results['servers'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+                file.write('\n')
+
+    def report(self, servers):
+        self.stdout.write(
+            f'{"сервер":<7}{"эндпоинт":<13}{"запр/с":>9}'
+            f'{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}{"ошибки":>8}'
+        )
+        for server, result in servers.items():
+            rows = dict(result['endpoints'], total=result['total'])
+            for name, row in rows.items():
+                self.stdout.write(
+                    f'{server:<7}{name:<13}{row["throughput_rps"]:>9}'
+                    f'{row["p50_ms"]:>10}{row["p95_ms"]:>10}'
+                    f'{row["p99_ms"]:>10}{row["errors"]:>8}'
+                )
+        if {'wsgi', 'asgi'} <= set(servers):
+            wsgi, asgi = servers['wsgi']['total'], servers['asgi']['total']
+            if wsgi['throughput_rps'] and wsgi['p99_ms']:
+                self.stdout.write(
+                    'ASGI / WSGI: запр/с '
+                    f'{asgi["throughput_rps"] / wsgi["throughput_rps"]:.2f}, '
+                    f'p99 {asgi["p99_ms"] / wsgi["p99_ms"]:.2f}'
+                )
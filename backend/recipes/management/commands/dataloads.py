@@ -1,28 +1,102 @@
 import os
-from csv import DictReader
+import time
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from recipes.models import Ingredient
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from recipes.bulk_load import (LOADERS, READERS, batched, copy_available,
+                               get_loader)
+from recipes.catalog import bump_catalog_version
+
+BATCH_SIZE = 5000
+
+EXTENSIONS = {
+    '.csv': 'csv',
+    '.json': 'json',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
 
 
 class Command(BaseCommand):
     """Загрузка ингредиентов."""
 
-    help = 'Загрузка ингредиентов.'
+    help = (
+        'Загрузка ингредиентов, тегов, пользователей и рецептов '
+        'из файлов CSV, JSON и NDJSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Файлы данных; по умолчанию data/ingredients.csv.'
+        )
+        parser.add_argument(
+            '--model', choices=LOADERS, default='ingredients',
+            help='Набор данных, который содержат файлы.'
+        )
+        parser.add_argument(
+            '--format', choices=tuple(READERS),
+            help='Формат файлов; по умолчанию определяется по расширению.'
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY даже на PostgreSQL.'
+        )
 
     def handle(self, *args, **options):
-        """Загрузка csv-файлов."""
-        path = os.path.join(settings.BASE_DIR, 'data/ingredients.csv')
-        with open(path, 'r', encoding='utf-8') as file:
-            reader = DictReader(
-                file, fieldnames=('name', 'measurement_unit',)
+        """Потоковая загрузка файлов пакетами."""
+        paths = options['paths'] or [
+            os.path.join(settings.BASE_DIR, 'data/ingredients.csv')
+        ]
+        loader = get_loader(options['model'])
+        use_copy = (
+            copy_available()
+            and not options['no_copy']
+            and options['model'] != 'recipes'
+        )
+        for path in paths:
+            file_format = options['format'] or EXTENSIONS.get(
+                os.path.splitext(path)[1].lower()
             )
-            ingredients = [
-                Ingredient(
-                    name=row['name'], measurement_unit=row['measurement_unit']
-                )
-                for row in reader
-            ]
-            Ingredient.objects.bulk_create(ingredients, ignore_conflicts=True)
-            print('Data is load.')
+            if file_format is None:
+                raise CommandError(f'Неизвестный формат файла {path}.')
+            if file_format == 'csv' and loader.fieldnames is None:
+                raise CommandError('Рецепты загружаются из JSON или NDJSON.')
+            try:
+                self.load_file(path, file_format, loader, use_copy, options)
+            except ValidationError as error:
+                raise CommandError(' '.join(error.messages))
+
+        if options['model'] in ('ingredients', 'tags'):
+            bump_catalog_version()
+        if options['model'] == 'recipes':
+            call_command('recount', stdout=self.stdout)
+        self.stdout.write('Data is load.')
+
+    def load_file(self, path, file_format, loader, use_copy, options):
+        """Загрузка одного файла с выводом скорости."""
+        started = time.monotonic()
+        total = loaded = 0
+        with open(path, 'r', encoding='utf-8') as file:
+            if file_format == 'csv':
+                rows = READERS['csv'](file, loader.fieldnames)
+            else:
+                rows = READERS[file_format](file)
+            for batch in batched(rows, options['batch_size']):
+                loaded += loader.load(batch, use_copy)
+                total += len(batch)
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        self.speed(path, total, loaded, started)
+                    )
+        self.stdout.write(self.speed(path, total, loaded, started))
+
+    def speed(self, path, total, loaded, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        return (
+            f'{path}: записано {loaded} из {total} строк '
+            f'за {elapsed:.2f} с ({total / elapsed:.0f} строк/с)'
+        )
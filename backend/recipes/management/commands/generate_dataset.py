@@ -0,0 +1,57 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from recipes.catalog import bump_catalog_version
+from recipes.models import Ingredient
+from recipes.synthetic import SCALES, DatasetGenerator
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    """Генерация синтетического набора данных."""
+
+    help = (
+        'Генерация пользователей, подписок, рецептов, избранного '
+        'и списков покупок для проверки производительности.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', choices=tuple(SCALES), default='10k',
+            help='Количество рецептов.'
+        )
+        parser.add_argument(
+            '--recipes', type=int,
+            help='Точное количество рецептов вместо --scale.'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        """Генерация данных по этапам с выводом времени."""
+        generator = DatasetGenerator(
+            options['recipes'] or SCALES[options['scale']],
+            options['seed'],
+            options['batch_size']
+        )
+        if not Ingredient.objects.exists():
+            call_command('dataloads', stdout=self.stdout)
+        tags = self.stage('Теги', generator.ensure_tags)
+        user_ids = self.stage('Пользователи', generator.generate_users)
+        self.stage('Подписки', generator.generate_follows, user_ids)
+        self.stage('Счётчики подписчиков', call_command, 'recount')
+        self.stage('Рецепты', generator.generate_recipes, tags)
+        self.stage('Избранное', generator.generate_favorites, user_ids)
+        self.stage(
+            'Списки покупок', generator.generate_shopping_carts, user_ids
+        )
+        self.stage('Счётчики', call_command, 'recount')
+        bump_catalog_version()
+
+    def stage(self, title, function, *args):
+        started = time.monotonic()
+        result = function(*args)
+        self.stdout.write(f'{title}: {time.monotonic() - started:.1f} с')
+        return result
@@ -0,0 +1,42 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from recipes.bulk_load import batched
+from recipes.image_variants import generate_variants
+from recipes.models import Recipe
+
+BATCH_SIZE = 1000
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Создание уменьшенных копий загруженных изображений."""
+
+    help = 'Создание уменьшенных копий изображений рецептов и аватаров.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.IMAGE_VARIANT_WORKERS
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        """Параллельная обработка изображений пакетами."""
+        names = chain(
+            Recipe.objects.values_list('image', flat=True).iterator(),
+            User.objects.exclude(avatar=None).values_list(
+                'avatar', flat=True
+            ).iterator(),
+        )
+        created = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            for batch in batched(names, options['batch_size']):
+                batch = [name for name in dict.fromkeys(batch) if name]
+                created += sum(executor.map(
+                    generate_variants, batch, chunksize=16
+                ))
+        self.stdout.write(f'Создано копий изображений: {created}.')
@@ -0,0 +1,118 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.load_test import LoadTest, compare_results, load_collection
+
+COLLECTION = os.path.join(
+    settings.BASE_DIR,
+    '../postman_collection/foodgram.postman_collection.json'
+)
+
+
+class Command(BaseCommand):
+    """Нагрузочный прогон коллекции Postman."""
+
+    help = (
+        'Выполнение коллекции Postman виртуальными пользователями '
+        'против запущенного сервера с отчётом о задержках.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--collection', default=COLLECTION)
+        parser.add_argument(
+            '--base-url',
+            help='Адрес сервера вместо baseUrl из коллекции.'
+        )
+        parser.add_argument(
+            '--users', type=int, default=10,
+            help='Количество виртуальных пользователей.'
+        )
+        parser.add_argument(
+            '--ramp-up', type=float, default=0,
+            help='Время запуска всех пользователей, секунды.'
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=1,
+            help='Сколько раз каждый пользователь выполняет коллекцию.'
+        )
+        parser.add_argument(
+            '--duration', type=float,
+            help='Длительность прогона после разгона, секунды; '
+                 'заменяет --iterations.'
+        )
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument(
+            '--skip', action='append', default=[],
+            help='Пропустить запросы и папки, в пути которых есть строка.'
+        )
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+        parser.add_argument(
+            '--baseline',
+            help='Результаты прошлого прогона в JSON для сравнения.'
+        )
+
+    def handle(self, *args, **options):
+        """Прогон коллекции, отчёт и сохранение результатов."""
+        if options['users'] < 1 or options['iterations'] < 1:
+            raise CommandError(
+                'Нужны хотя бы один пользователь и одна итерация.'
+            )
+        try:
+            variables, requests = load_collection(
+                options['collection'], options['skip']
+            )
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f'Не удалось прочитать коллекцию: {error}')
+        results = LoadTest(
+            variables,
+            requests,
+            base_url=options['base_url'],
+            users=options['users'],
+            ramp_up=options['ramp_up'],
+            iterations=options['iterations'],
+            duration=options['duration'],
+            timeout=options['timeout'],
+        ).run()
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+                file.write('\n')
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                self.report_changes(compare_results(results, json.load(file)))
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"запрос":<60}{"число":>7}{"rps":>8}'
+            f'{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}  коды'
+        )
+        rows = dict(results['requests'], total=results['total'])
+        for name, result in rows.items():
+            codes = ' '.join(
+                f'{code}:{count}'
+                for code, count in result.get('statuses', {}).items()
+            )
+            if result['errors']:
+                codes += f' ошибки:{result["errors"]}'
+            self.stdout.write(
+                f'{name[-59:]:<60}{result["count"]:>7}'
+                f'{result["throughput_rps"]:>8}{result["p50_ms"]:>10}'
+                f'{result["p95_ms"]:>10}{result["p99_ms"]:>10}  {codes}'
+            )
+        self.stdout.write(
+            f'{results["users"]} пользователей, '
+            f'{results["duration_s"]} с, '
+            f'{results["total"]["throughput_rps"]} запросов в секунду.'
+        )
+
+    def report_changes(self, rows):
+        self.stdout.write(
+            f'{"запрос":<60}{"p95 было":>10}{"p95 стало":>11}{"%":>8}'
+        )
+        for name, before, after, change in rows:
+            self.stdout.write(
+                f'{name[-59:]:<60}{before:>10}{after:>11}{change:>+8.1f}'
+            )
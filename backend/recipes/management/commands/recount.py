@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from recipes.counters import count_subquery
+from recipes.models import Favourites, Recipe, ShoppingList
+from users.models import Follow
+
+BATCH_SIZE = 5000
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Пересчёт денормализованных счётчиков."""
+
+    help = 'Пересчёт счётчиков рецептов и пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        """Пересчёт счётчиков диапазонами id."""
+        batch_size = options['batch_size']
+        self.recount(Recipe, batch_size, {
+            'favorites_count': count_subquery(Favourites, 'recipe'),
+            'shopping_cart_count': count_subquery(ShoppingList, 'recipe'),
+        })
+        self.recount(User, batch_size, {
+            'recipes_count': count_subquery(Recipe, 'author'),
+            'followers_count': count_subquery(Follow, 'author'),
+        })
+
+    def recount(self, model, batch_size, counters):
+        """Обновление счётчиков модели одним запросом на пакет."""
+        max_id = model.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        for start in range(0, max_id, batch_size):
+            model.objects.filter(
+                id__gt=start, id__lte=start + batch_size
+            ).update(**counters)
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: счётчики пересчитаны.'
+        )
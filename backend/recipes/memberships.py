@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from recipes.models import Favourites, ShoppingList
+from users.models import Follow
+
+FAVORITES = 'favorites'
+SHOPPING_CART = 'shopping_cart'
+FOLLOWING = 'following'
+
+# Набор -> модель связи и поле с id элемента набора.
+SETS = {
+    FAVORITES: (Favourites, 'recipe_id'),
+    SHOPPING_CART: (ShoppingList, 'recipe_id'),
+    FOLLOWING: (Follow, 'author_id'),
+}
+
+# Модель связи -> набор.
+MODEL_SETS = {model: kind for kind, (model, _) in SETS.items()}
+
+
+def membership_key(kind, user_id):
+    return f'memberships:{kind}:{user_id}'
+
+
+def forget_memberships(model, user_ids):
+    """Удаление наборов пользователей из кэша сразу и после фиксации.
+
+    Вызывается обработчиками сигналов моделей связей и после массовой
+    записи связей в обход сигналов.
+    """
+    kind = MODEL_SETS[model]
+    keys = [membership_key(kind, user_id) for user_id in set(user_ids)]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class UserMemberships:
+    """Наборы id избранного, списка покупок и авторов подписок пользователя.
+
+    Каждый набор загружается при первом обращении одним запросом
+    и хранится в кэше, поэтому флаги всех объектов страницы
+    проверяются в памяти. Любое изменение связей удаляет набор из кэша,
+    действия API перечитывают его для своего ответа.
+    """
+
+    def __init__(self, user):
+        self.user_id = user.pk if user.is_authenticated else None
+        self.sets = {}
+
+    def load(self, kind):
+        model, field = SETS[kind]
+        return frozenset(model.objects.filter(
+            user_id=self.user_id
+        ).values_list(field, flat=True))
+
+    def get(self, kind):
+        """Набор id; для анонимного пользователя пустой."""
+        if self.user_id is None:
+            return frozenset()
+        ids = self.sets.get(kind)
+        if ids is None:
+            key = membership_key(kind, self.user_id)
+            ids = cache.get(key)
+            if ids is None:
+                ids = self.load(kind)
+                cache.set(key, ids, settings.MEMBERSHIP_CACHE_TIMEOUT)
+            self.sets[kind] = ids
+        return ids
+
+    def contains(self, kind, pk):
+        return pk in self.get(kind)
+
+    def changed(self, kind):
+        """Перечитывание набора после изменения связей пользователя.
+
+        Перечитанный набор нужен только текущему запросу; из кэша набор
+        удаляют обработчики сигналов моделей связей.
+        """
+        self.sets[kind] = self.load(kind)
+
+
+def user_memberships(request):
+    """Наборы пользователя запроса, общие для всех сериализаторов."""
+    memberships = getattr(request, 'memberships', None)
+    if memberships is None:
+        memberships = request.memberships = UserMemberships(request.user)
+    return memberships
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:38
+
+from django.db import migrations, models
+
+
+def empty_short_url_to_null(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Recipe.objects.filter(short_url='').update(short_url=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='legacy_short_url',
+            field=models.CharField(blank=True, max_length=20, null=True, unique=True, verbose_name='Прежняя короткая ссылка'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='short_url',
+            field=models.CharField(blank=True, db_index=True, max_length=20, null=True, unique=True),
+        ),
+        migrations.RunPython(
+            empty_short_url_to_null, migrations.RunPython.noop
+        ),
+    ]
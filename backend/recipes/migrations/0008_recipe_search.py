@@ -0,0 +1,69 @@
+from django.db import migrations
+
+POSTGRESQL_FORWARD = (
+    "ALTER TABLE recipes_recipe ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(text, '')), 'B')"
+    ") STORED",
+    "CREATE INDEX recipe_search_vector_idx ON recipes_recipe "
+    "USING GIN (search_vector)",
+)
+POSTGRESQL_BACKWARD = (
+    "DROP INDEX IF EXISTS recipe_search_vector_idx",
+    "ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector",
+)
+SQLITE_TRIGGERS = (
+    "CREATE TRIGGER recipes_recipe_fts_insert AFTER INSERT ON recipes_recipe "
+    "BEGIN INSERT INTO recipes_recipe_fts(rowid, name, text) "
+    "VALUES (new.id, new.name, new.text); END",
+    "CREATE TRIGGER recipes_recipe_fts_delete AFTER DELETE ON recipes_recipe "
+    "BEGIN INSERT INTO recipes_recipe_fts(recipes_recipe_fts, rowid, name, text) "
+    "VALUES ('delete', old.id, old.name, old.text); END",
+    "CREATE TRIGGER recipes_recipe_fts_update "
+    "AFTER UPDATE OF name, text ON recipes_recipe "
+    "BEGIN INSERT INTO recipes_recipe_fts(recipes_recipe_fts, rowid, name, text) "
+    "VALUES ('delete', old.id, old.name, old.text); "
+    "INSERT INTO recipes_recipe_fts(rowid, name, text) "
+    "VALUES (new.id, new.name, new.text); END",
+)
+SQLITE_FORWARD = (
+    "CREATE VIRTUAL TABLE recipes_recipe_fts USING fts5("
+    "name, text, content='recipes_recipe', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    *SQLITE_TRIGGERS,
+    "INSERT INTO recipes_recipe_fts(recipes_recipe_fts) VALUES ('rebuild')",
+)
+SQLITE_BACKWARD = (
+    "DROP TRIGGER IF EXISTS recipes_recipe_fts_insert",
+    "DROP TRIGGER IF EXISTS recipes_recipe_fts_delete",
+    "DROP TRIGGER IF EXISTS recipes_recipe_fts_update",
+    "DROP TABLE IF EXISTS recipes_recipe_fts",
+)
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_feedentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements({
+                'postgresql': POSTGRESQL_FORWARD,
+                'sqlite': SQLITE_FORWARD,
+            }),
+            run_statements({
+                'postgresql': POSTGRESQL_BACKWARD,
+                'sqlite': SQLITE_BACKWARD,
+            })
+        ),
+    ]
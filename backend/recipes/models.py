@@ -1,11 +1,12 @@
-from datetime import datetime
-
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.db import models
-from django.db.models import UniqueConstraint
-from sqids import Sqids
+from django.db.models import (Count, F, OuterRef, Prefetch, Q, Subquery,
+                              UniqueConstraint)
+
+from recipes.counters import CountersMixin
+from recipes.short_links import encode_short_url
 
 NAME_MAX_LENGTH = 150
 EMAIL_MAX_LENGTH = 254
@@ -16,10 +17,19 @@ MIN_VALUE = 1
 TAG_SLUG_MAX_LENGTH = 32
 TAG_NAME_MAX_LENGTH = 32
 INGREDIENT_NAME_MAX_LENGTH = 128
+MAX_TAGS = 63
 
 User = get_user_model()
 
 
+def free_tag_bit(used):
+    """Первый свободный бит маски тегов."""
+    for bit in range(MAX_TAGS):
+        if bit not in used:
+            return bit
+    raise ValidationError(f'Можно создать не более {MAX_TAGS} тегов.')
+
+
 class Tag(models.Model):
     """Модель тега."""
 
@@ -33,6 +43,9 @@ class Tag(models.Model):
         max_length=TAG_SLUG_MAX_LENGTH,
         unique=True
     )
+    bit = models.PositiveSmallIntegerField(
+        'Бит тега в маске рецепта', unique=True, editable=False
+    )
 
     class Meta:
         ordering = ('name', 'slug',)
@@ -42,6 +55,18 @@ class Tag(models.Model):
     def __str__(self):
         return self.name[:50]
 
+    @property
+    def mask(self):
+        return 1 << self.bit
+
+    def save(self, *args, **kwargs):
+        """Назначение тегу свободного бита маски."""
+        if self.bit is None:
+            self.bit = free_tag_bit(
+                set(Tag.objects.values_list('bit', flat=True))
+            )
+        super().save(*args, **kwargs)
+
 
 class Ingredient(models.Model):
     """Модель ингредиента."""
@@ -77,9 +102,93 @@ class Ingredient(models.Model):
             })
 
 
-class Recipe(models.Model):
+def keyset_filter(queryset, position, reverse, date_field, id_field):
+    """Упорядочивание по паре (дата, id) и отсечение по позиции курсора.
+
+    Условие на одну дату задаёт границу, с которой поиск по индексу
+    начинается сразу от позиции курсора, а не с начала индекса.
+    """
+    if reverse:
+        queryset = queryset.order_by(date_field, id_field)
+    else:
+        queryset = queryset.order_by(f'-{date_field}', f'-{id_field}')
+    if position is None:
+        return queryset
+    pub_date, pk = position
+    lookup = 'gt' if reverse else 'lt'
+    return queryset.filter(
+        Q(**{f'{date_field}__{lookup}e': pub_date}),
+        Q(**{f'{date_field}__{lookup}': pub_date})
+        | Q(**{date_field: pub_date, f'{id_field}__{lookup}': pk})
+    )
+
+
+class RecipeQuerySet(models.QuerySet):
+    """Запросы к рецептам, оптимизированные для чтения."""
+
+    def for_read(self):
+        """Рецепты со всеми связанными данными для сериализации.
+
+        Флаги избранного, списка покупок и подписки сериализаторы
+        берут из наборов пользователя (recipes.memberships).
+        """
+        return self.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredient_list',
+                queryset=IngredientRecipe.objects.select_related('ingredient')
+            )
+        )
+
+    def with_tags(self, tags, match_all=False):
+        """Рецепты с любым или со всеми тегами по маске без JOIN."""
+        mask = sum(tag.mask for tag in tags)
+        queryset = self.alias(tag_hits=F('tag_mask').bitand(mask))
+        if match_all:
+            return queryset.filter(tag_hits=mask)
+        return queryset.filter(tag_hits__gt=0)
+
+    def tag_facets(self):
+        """Пары (тег, число рецептов с ним) одним запросом."""
+        tags = list(Tag.objects.all())
+        if not tags:
+            return []
+        names = {tag: f'tag_{tag.id}' for tag in tags}
+        counts = self.order_by().alias(**{
+            name: F('tag_mask').bitand(tag.mask)
+            for tag, name in names.items()
+        }).aggregate(**{
+            name: Count('id', filter=Q(**{f'{name}__gt': 0}))
+            for name in names.values()
+        })
+        return [(tag, counts[name]) for tag, name in names.items()]
+
+    def refresh_tag_masks(self):
+        """Пересчёт масок тегов рецептов по связям с тегами."""
+        masks = dict.fromkeys(self.values_list('id', flat=True), 0)
+        for recipe_id, bit in Recipe.tags.through.objects.filter(
+            recipe_id__in=masks
+        ).values_list('recipe_id', 'tag__bit'):
+            masks[recipe_id] |= 1 << bit
+        Recipe.objects.bulk_update(
+            [Recipe(id=pk, tag_mask=mask) for pk, mask in masks.items()],
+            ('tag_mask',)
+        )
+
+    def latest_per_author(self, limit):
+        """Не более limit последних рецептов каждого автора одним запросом."""
+        return self.filter(id__in=Subquery(
+            Recipe.objects.filter(
+                author=OuterRef('author')
+            ).order_by('-pub_date', '-id').values('id')[:limit]
+        ))
+
+
+class Recipe(CountersMixin, models.Model):
     """Модель рецепта."""
 
+    counter_fields = ('favorites_count', 'shopping_cart_count')
+
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -115,30 +224,51 @@ class Recipe(models.Model):
         max_length=SHORT_URL_MAX_LENGTH,
         unique=True,
         db_index=True,
-        blank=True
+        blank=True,
+        null=True
+    )
+    favorites_count = models.PositiveIntegerField(
+        'Добавлений в избранное', default=0, editable=False
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        'Добавлений в список покупок', default=0, editable=False
+    )
+    legacy_short_url = models.CharField(
+        'Прежняя короткая ссылка',
+        max_length=SHORT_URL_MAX_LENGTH,
+        unique=True,
+        blank=True,
+        null=True
+    )
+    tag_mask = models.BigIntegerField(
+        'Маска тегов', default=0, editable=False
     )
 
+    objects = RecipeQuerySet.as_manager()
+
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'), name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='recipe_author_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name
 
     def save(self, *args, **kwargs):
         """Создание короткой ссылки."""
+        super().save(*args, **kwargs)
         if not self.short_url:
-            today = datetime.today()
-            keys_for_short_url = [
-                round(today.timestamp() * 1000),
-                self.author.id,
-                self.cooking_time
-            ]
-            sqids = Sqids()
-            code = sqids.encode(keys_for_short_url)
-            self.short_url = code
-        return super(Recipe, self).save(*args, **kwargs)
+            self.short_url = encode_short_url(self.id)
+            Recipe.objects.filter(pk=self.pk).update(short_url=self.short_url)
 
 
 class IngredientRecipe(models.Model):
@@ -250,3 +380,40 @@ class ShoppingList(FavouritesAndShoppingList):
             raise ValidationError({
                 'recipe': 'Рецепт уже добавлен в список покупок.'
             })
+
+
+class FeedEntry(models.Model):
+    """Запись ленты подписок: рецепт автора, на которого подписан user."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Подписчик'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт'
+    )
+    pub_date = models.DateTimeField('Дата публикации рецепта')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        constraints = (
+            UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_user_and_recipe_in_FeedEntry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='feed_user_pub_date_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'Рецепт {self.recipe_id} в ленте {self.user_id}'
@@ -0,0 +1,121 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections, router
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'russian'
+SEARCH_RANK = 'search_rank'
+FTS_TABLE = 'recipes_recipe_fts'
+WORD = re.compile(r'\w+')
+
+POSTGRESQL_MATCH = (
+    '"recipes_recipe"."search_vector" '
+    '@@ websearch_to_tsquery(%s::regconfig, %s)'
+)
+POSTGRESQL_RANK = (
+    'ts_rank_cd("recipes_recipe"."search_vector", '
+    'websearch_to_tsquery(%s::regconfig, %s))'
+)
+SQLITE_MATCH = (
+    f'"recipes_recipe"."id" IN (SELECT rowid FROM {FTS_TABLE} '
+    f'WHERE {FTS_TABLE} MATCH %s)'
+)
+SQLITE_RANK = (
+    f'(SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+    f'WHERE {FTS_TABLE} MATCH %s AND rowid = "recipes_recipe"."id")'
+)
+# Триггеры синхронизации FTS5 с таблицей рецептов.
+SQLITE_TRIGGERS = {
+    'recipes_recipe_fts_insert': (
+        'AFTER INSERT ON recipes_recipe '
+        f'BEGIN INSERT INTO {FTS_TABLE}(rowid, name, text) '
+        'VALUES (new.id, new.name, new.text); END'
+    ),
+    'recipes_recipe_fts_delete': (
+        'AFTER DELETE ON recipes_recipe '
+        f'BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, text) '
+        "VALUES ('delete', old.id, old.name, old.text); END"
+    ),
+    'recipes_recipe_fts_update': (
+        'AFTER UPDATE OF name, text ON recipes_recipe '
+        f'BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, text) '
+        "VALUES ('delete', old.id, old.name, old.text); "
+        f'INSERT INTO {FTS_TABLE}(rowid, name, text) '
+        'VALUES (new.id, new.name, new.text); END'
+    ),
+}
+
+
+def fts5_query(query):
+    """Запрос FTS5 из слов пользователя: все слова, поиск по префиксу."""
+    return ' '.join(
+        '"{}"*'.format(word.replace('"', '""'))
+        for word in WORD.findall(query)
+    )
+
+
+def search_recipes(queryset, query):
+    """Рецепты, найденные по названию и описанию, по убыванию релевантности.
+
+    На PostgreSQL используется столбец search_vector с GIN-индексом,
+    на SQLite - таблица FTS5. Совпадения в названии весят больше,
+    чем в описании.
+    """
+    if connection.vendor == 'postgresql':
+        params = (SEARCH_CONFIG, query)
+        match, rank = POSTGRESQL_MATCH, POSTGRESQL_RANK
+    elif connection.vendor == 'sqlite':
+        query = fts5_query(query)
+        if not query:
+            return queryset.none()
+        params = (query,)
+        match, rank = SQLITE_MATCH, SQLITE_RANK
+    else:
+        return queryset.filter(name__icontains=query)
+    return queryset.filter(
+        RawSQL(match, params, output_field=BooleanField())
+    ).annotate(**{
+        SEARCH_RANK: RawSQL(rank, params, output_field=FloatField())
+    }).order_by(f'-{SEARCH_RANK}', '-pub_date', '-id')
+
+
+def is_ranked(queryset):
+    """Упорядочены ли рецепты по релевантности поиска или подбора."""
+    return SEARCH_RANK in queryset.query.annotations
+
+
+def create_search_triggers(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Восстановление триггеров FTS5 после миграций на SQLite.
+
+    SQLite при изменении таблицы рецептов пересоздаёт её без
+    триггеров. Недостающие триггеры создаются заново, а индекс
+    перестраивается, чтобы учесть изменения, сделанные без них.
+    """
+    from recipes.models import Recipe
+
+    database = connections[using]
+    if (
+        database.vendor != 'sqlite'
+        or not router.allow_migrate_model(using, Recipe)
+    ):
+        return
+    with database.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, name FROM sqlite_master "
+            "WHERE type = 'table' AND name = %s "
+            "OR type = 'trigger' AND tbl_name = 'recipes_recipe'",
+            (FTS_TABLE,)
+        )
+        existing = {name for _, name in cursor.fetchall()}
+        if FTS_TABLE not in existing:
+            return
+        missing = [name for name in SQLITE_TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {name} {SQLITE_TRIGGERS[name]}'
+            )
+        if missing:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+            )
@@ -0,0 +1,28 @@
+from django.conf import settings
+from sqids import Sqids
+
+sqids = Sqids(min_length=settings.SHORT_URL_MIN_LENGTH)
+
+
+def encode_short_url(recipe_id):
+    """Короткий код рецепта по его id."""
+    return sqids.encode([recipe_id])
+
+
+def decode_short_url(code):
+    """Id рецепта по короткому коду или None для чужих кодов.
+
+    Код считается своим, только если он декодируется в одно число
+    и кодируется обратно в ту же строку. Слишком длинные коды
+    декодируются в числа, которые sqids не кодирует, и тоже чужие.
+    """
+    numbers = sqids.decode(code)
+    if len(numbers) != 1:
+        return None
+    try:
+        encoded = sqids.encode(numbers)
+    except ValueError:
+        return None
+    if encoded != code:
+        return None
+    return numbers[0]
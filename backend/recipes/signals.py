@@ -0,0 +1,176 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from recipes.catalog import bump_catalog_version
+from recipes.counters import change_counter
+from recipes.detail_cache import forget_recipe_details
+from recipes.feed import clear_feed, fan_out_recipes, fill_feed
+from recipes.image_variants import schedule_variants
+from recipes.ingredient_matching import recipe_ingredient_index
+from recipes.ingredient_index import ingredient_index
+from recipes.memberships import forget_memberships
+from recipes.models import (Favourites, Ingredient, IngredientRecipe,
+                            Recipe, ShoppingList, Tag)
+from users.models import Follow
+
+User = get_user_model()
+
+RECIPE_COUNTERS = {
+    Favourites: 'favorites_count',
+    ShoppingList: 'shopping_cart_count',
+}
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def refresh_ingredient_index(**kwargs):
+    """Обновление индекса при изменении ингредиентов."""
+    ingredient_index.invalidate()
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def refresh_catalog_version(**kwargs):
+    """Смена версии справочников при изменении тегов и ингредиентов.
+
+    Версия меняется после фиксации транзакции: иначе параллельный
+    запрос мог бы закэшировать прежние строки под новой версией.
+    """
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Favourites)
+@receiver(post_save, sender=ShoppingList)
+def increase_recipe_counter(sender, instance, created, **kwargs):
+    """Увеличение счётчиков рецепта при добавлении."""
+    if created:
+        change_counter(
+            Recipe.objects.filter(pk=instance.recipe_id),
+            RECIPE_COUNTERS[sender], 1
+        )
+
+
+@receiver(post_delete, sender=Favourites)
+@receiver(post_delete, sender=ShoppingList)
+def decrease_recipe_counter(sender, instance, **kwargs):
+    """Уменьшение счётчиков рецепта при удалении."""
+    change_counter(
+        Recipe.objects.filter(pk=instance.recipe_id),
+        RECIPE_COUNTERS[sender], -1
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def increase_recipes_count(instance, created, **kwargs):
+    """Увеличение количества рецептов автора."""
+    if created:
+        change_counter(
+            User.objects.filter(pk=instance.author_id), 'recipes_count', 1
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def decrease_recipes_count(instance, **kwargs):
+    """Уменьшение количества рецептов автора."""
+    change_counter(
+        User.objects.filter(pk=instance.author_id), 'recipes_count', -1
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def create_recipe_image_variants(instance, update_fields, **kwargs):
+    """Создание уменьшенных копий изображения рецепта."""
+    if update_fields is None or 'image' in update_fields:
+        name = instance.image.name
+        pks = (instance.pk,)
+        transaction.on_commit(lambda: schedule_variants(
+            name, lambda: forget_recipe_details(pks)
+        ))
+
+
+@receiver(post_save, sender=Recipe)
+def add_recipe_to_feeds(instance, created, **kwargs):
+    """Запись нового рецепта в ленты подписчиков."""
+    if created:
+        fan_out_recipes((instance,))
+
+
+@receiver(post_save, sender=Follow)
+def add_author_to_feed(instance, created, **kwargs):
+    """Запись рецептов автора в ленту после подписки."""
+    if created:
+        fill_feed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_author_from_feed(instance, **kwargs):
+    """Удаление рецептов автора из ленты после отписки."""
+    clear_feed(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def refresh_recipe_ingredient_index(instance, **kwargs):
+    """Обновление состава рецепта в индексе подбора после сохранения."""
+    pk = instance.pk
+    transaction.on_commit(lambda: recipe_ingredient_index.changed((pk,)))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def refresh_tag_masks(instance, action, reverse, pk_set, **kwargs):
+    """Пересчёт маски тегов после изменения тегов рецепта."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        recipes = Recipe.objects.filter(pk=instance.pk)
+    elif action == 'post_clear':
+        recipes = Recipe.objects.alias(
+            tag_hits=F('tag_mask').bitand(instance.mask)
+        ).filter(tag_hits__gt=0)
+    else:
+        recipes = Recipe.objects.filter(pk__in=pk_set)
+    recipes.refresh_tag_masks()
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+@receiver((post_save, post_delete), sender=Favourites)
+def forget_recipe_detail(sender, instance, **kwargs):
+    """Сброс кэша рецепта после изменения его данных или счётчиков."""
+    forget_recipe_details(
+        (instance.pk if sender is Recipe else instance.recipe_id,)
+    )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def forget_tagged_recipe_details(instance, action, reverse, pk_set,
+                                 **kwargs):
+    """Сброс кэша рецептов после изменения их тегов."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            forget_recipe_details((instance.pk,))
+    elif action in ('post_add', 'post_remove'):
+        forget_recipe_details(pk_set)
+    elif action == 'pre_clear':
+        forget_recipe_details(Recipe.objects.filter(
+            tags=instance
+        ).values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def remove_tag_from_masks(instance, **kwargs):
+    """Снятие бита удаляемого тега с масок рецептов."""
+    Recipe.objects.filter(tags=instance).update(
+        tag_mask=F('tag_mask') - instance.mask
+    )
+
+
+@receiver((post_save, post_delete), sender=Favourites)
+@receiver((post_save, post_delete), sender=ShoppingList)
+@receiver((post_save, post_delete), sender=Follow)
+def forget_user_memberships(sender, instance, **kwargs):
+    """Сброс кэша наборов пользователя после изменения его связей."""
+    forget_memberships(sender, (instance.user_id,))
@@ -0,0 +1,196 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from recipes.bulk_load import RecipeLoader, UserLoader, batched
+from recipes.memberships import forget_memberships
+from recipes.models import Favourites, Ingredient, Recipe, ShoppingList, Tag
+from users.models import Follow
+
+User = get_user_model()
+
+SCALES = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+RECIPES_PER_USER = 10
+EMAIL_DOMAIN = 'synthetic.foodgram.local'
+PASSWORD = 'synthetic-password'
+IMAGE = 'recipes/synthetic.png'
+ZIPF_EXPONENT = 1.1
+HISTORY_DAYS = 3 * 365
+
+TAGS = (
+    ('Завтрак', 'breakfast'),
+    ('Обед', 'lunch'),
+    ('Ужин', 'dinner'),
+    ('Десерт', 'dessert'),
+    ('Выпечка', 'baking'),
+    ('Вегетарианское', 'vegetarian'),
+    ('Быстро', 'quick'),
+    ('Праздничное', 'holiday'),
+)
+FIRST_NAMES = (
+    'Анна', 'Иван', 'Мария', 'Пётр', 'Ольга', 'Алексей', 'Елена',
+    'Дмитрий', 'Наталья', 'Сергей', 'Ирина', 'Михаил',
+)
+LAST_NAMES = (
+    'Иванова', 'Смирнов', 'Кузнецова', 'Попов', 'Соколова', 'Лебедев',
+    'Козлова', 'Новиков', 'Морозова', 'Волков',
+)
+DISH_ADJECTIVES = (
+    'Домашний', 'Быстрый', 'Пряный', 'Летний', 'Зимний', 'Бабушкин',
+    'Сливочный', 'Острый', 'Лёгкий', 'Сытный', 'Праздничный',
+)
+DISHES = (
+    'суп', 'салат', 'пирог', 'борщ', 'плов', 'омлет', 'рагу', 'соус',
+    'гуляш', 'пудинг', 'кекс', 'жаркое', 'суп-пюре', 'запеканка',
+)
+STEPS = (
+    'Нарежьте ингредиенты.', 'Разогрейте сковороду с маслом.',
+    'Доведите до кипения и убавьте огонь.', 'Посолите и поперчите.',
+    'Запекайте до золотистой корочки.', 'Перемешайте и дайте настояться.',
+    'Подавайте горячим.', 'Украсьте зеленью.',
+)
+
+
+def zipf_weights(size):
+    """Накопленные веса закона Ципфа: первые элементы популярнее."""
+    return list(accumulate(
+        1 / rank ** ZIPF_EXPONENT for rank in range(1, size + 1)
+    ))
+
+
+class DatasetGenerator:
+    """Генератор воспроизводимого набора данных заданного размера.
+
+    Популярность авторов и рецептов распределена по закону Ципфа,
+    даты публикации - равномерно за несколько лет. Одинаковые
+    seed и размер дают одинаковые данные.
+    """
+
+    def __init__(self, recipes, seed, batch_size):
+        self.recipes = recipes
+        self.users = max(recipes // RECIPES_PER_USER, 2)
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.now = timezone.now()
+
+    def email(self, number):
+        return f'user{number}@{EMAIL_DOMAIN}'
+
+    def ensure_tags(self):
+        """Теги набора данных; недостающие создаются."""
+        existing = set(Tag.objects.values_list('slug', flat=True))
+        for name, slug in TAGS:
+            if slug not in existing:
+                Tag.objects.create(name=name, slug=slug)
+        return [slug for _, slug in TAGS]
+
+    def user_rows(self):
+        for number in range(self.users):
+            yield {
+                'email': self.email(number),
+                'username': f'user{number}',
+                'first_name': self.random.choice(FIRST_NAMES),
+                'last_name': self.random.choice(LAST_NAMES),
+                'password': PASSWORD,
+            }
+
+    def generate_users(self):
+        """Пользователи; возвращает их id в порядке номеров."""
+        loader = UserLoader()
+        for batch in batched(self.user_rows(), self.batch_size):
+            loader.load(batch, use_copy=False)
+        ids = dict(User.objects.filter(
+            email__endswith=f'@{EMAIL_DOMAIN}'
+        ).values_list('email', 'id'))
+        return [ids[self.email(number)] for number in range(self.users)]
+
+    def generate_follows(self, user_ids):
+        """Подписки с перекосом в сторону популярных авторов."""
+        weights = zipf_weights(len(user_ids))
+
+        def follows():
+            for user_id in user_ids:
+                count = min(int(self.random.paretovariate(1.5) * 3), 200)
+                authors = set(self.random.choices(
+                    user_ids, cum_weights=weights, k=count
+                ))
+                authors.discard(user_id)
+                for author_id in authors:
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+        for batch in batched(follows(), self.batch_size):
+            Follow.objects.bulk_create(batch, ignore_conflicts=True)
+            forget_memberships(Follow, (follow.user_id for follow in batch))
+
+    def recipe_rows(self, tags, ingredients):
+        weights = zipf_weights(self.users)
+        numbers = range(self.users)
+        for _ in range(self.recipes):
+            author = self.random.choices(numbers, cum_weights=weights)[0]
+            yield {
+                'author': self.email(author),
+                'name': '{} {}'.format(
+                    self.random.choice(DISH_ADJECTIVES),
+                    self.random.choice(DISHES)
+                ),
+                'text': ' '.join(self.random.choices(STEPS, k=4)),
+                'cooking_time': self.random.randint(5, 180),
+                'image': IMAGE,
+                'pub_date': self.now - timedelta(
+                    seconds=self.random.randint(0, HISTORY_DAYS * 86400)
+                ),
+                'tags': self.random.sample(tags, self.random.randint(1, 3)),
+                'ingredients': [
+                    {'name': name, 'measurement_unit': unit,
+                     'amount': self.random.randint(1, 500)}
+                    for name, unit in self.random.sample(
+                        ingredients, self.random.randint(3, 12)
+                    )
+                ],
+            }
+
+    def generate_recipes(self, tags):
+        """Рецепты с тегами и ингредиентами через загрузчик рецептов."""
+        ingredients = list(
+            Ingredient.objects.values_list('name', 'measurement_unit')
+        )
+        loader = RecipeLoader()
+        rows = self.recipe_rows(tags, ingredients)
+        for batch in batched(rows, self.batch_size):
+            loader.load(batch, use_copy=False)
+
+    def generate_marks(self, model, user_ids, average):
+        """Избранное или список покупок с популярными рецептами."""
+        recipe_ids = list(
+            Recipe.objects.order_by('id').values_list('id', flat=True)
+        )
+        self.random.shuffle(recipe_ids)
+        weights = zipf_weights(len(recipe_ids))
+
+        def marks():
+            for user_id in user_ids:
+                count = min(
+                    int(self.random.expovariate(1 / average)),
+                    len(recipe_ids)
+                )
+                for recipe_id in set(self.random.choices(
+                    recipe_ids, cum_weights=weights, k=count
+                )):
+                    yield model(user_id=user_id, recipe_id=recipe_id)
+
+        for batch in batched(marks(), self.batch_size):
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+            forget_memberships(model, (mark.user_id for mark in batch))
+
+    def generate_favorites(self, user_ids):
+        self.generate_marks(Favourites, user_ids, average=20)
+
+    def generate_shopping_carts(self, user_ids):
+        self.generate_marks(ShoppingList, user_ids, average=5)
@@ -0,0 +1,192 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from api.tests import LOCAL_CACHES
+from recipes.catalog import get_catalog_version
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.search import (SQLITE_TRIGGERS, create_search_triggers,
+                            search_recipes)
+from users.models import FoodgramUser
+
+
+@override_settings(CACHES=LOCAL_CACHES, CACHE_IS_SHARED=False)
+class ShortLinkTest(TestCase):
+    """Перенаправление по коротким ссылкам рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = FoodgramUser.objects.create_user(
+            email='author@example.com',
+            username='author',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='Pa$$w0rd-author',
+        )
+        cls.recipe = Recipe.objects.create(
+            author=author,
+            name='Рецепт',
+            text='Описание',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+            legacy_short_url='Legacy1',
+        )
+        cls.recipe.refresh_from_db()
+
+    def test_short_url(self):
+        response = self.client.get(f'/s/{self.recipe.short_url}')
+        self.assertRedirects(
+            response, f'/recipes/{self.recipe.id}',
+            fetch_redirect_response=False
+        )
+
+    def test_legacy_short_url(self):
+        response = self.client.get('/s/Legacy1')
+        self.assertRedirects(
+            response, f'/recipes/{self.recipe.id}',
+            fetch_redirect_response=False
+        )
+
+    def test_long_code(self):
+        self.assertEqual(self.client.get('/s/' + 'Z' * 25).status_code, 404)
+
+    def test_unknown_code(self):
+        self.assertEqual(self.client.get('/s/unknown').status_code, 404)
+
+
+@override_settings(CACHES=LOCAL_CACHES, CACHE_IS_SHARED=False)
+class CatalogVersionTest(TestCase):
+    """Смена версии справочников после изменения тегов."""
+
+    def test_version_changes_on_commit(self):
+        version = get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Тег', slug='tag')
+            self.assertEqual(get_catalog_version(), version)
+        self.assertNotEqual(get_catalog_version(), version)
+
+
+@override_settings(CACHES=LOCAL_CACHES, CACHE_IS_SHARED=False)
+class RecipeLoadTest(TestCase):
+    """Загрузка рецептов командой dataloads."""
+
+    @classmethod
+    def setUpTestData(cls):
+        FoodgramUser.objects.create_user(
+            email='author@example.com',
+            username='author',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='Pa$$w0rd-author',
+        )
+        Tag.objects.create(name='Завтрак', slug='breakfast')
+        Ingredient.objects.create(name='Соль', measurement_unit='г')
+
+    def load(self, **fields):
+        row = {
+            'author': 'author@example.com',
+            'name': 'Рецепт',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'tags': ['breakfast'],
+            'ingredients': [
+                {'name': 'Соль', 'measurement_unit': 'г', 'amount': 5}
+            ],
+            **fields,
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'recipes.ndjson')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(json.dumps(row, ensure_ascii=False) + '\n')
+            call_command(
+                'dataloads', path, model='recipes', stdout=StringIO()
+            )
+
+    def test_load(self):
+        self.load()
+        recipe = Recipe.objects.get()
+        self.assertEqual(list(recipe.tags.values_list('slug', flat=True)),
+                         ['breakfast'])
+        self.assertEqual(recipe.ingredients.count(), 1)
+
+    def test_unknown_values(self):
+        cases = (
+            ({'author': 'nobody@example.com'}, 'nobody@example.com'),
+            ({'tags': ['dinner']}, 'dinner'),
+            ({'ingredients': [
+                {'name': 'Перец', 'measurement_unit': 'г', 'amount': 1}
+            ]}, 'Перец (г)'),
+        )
+        for fields, missing in cases:
+            with self.subTest(missing=missing):
+                with self.assertRaisesMessage(CommandError, missing):
+                    self.load(**fields)
+                self.assertFalse(Recipe.objects.exists())
+
+
+class SearchTest(TestCase):
+    """Полнотекстовый поиск рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = FoodgramUser.objects.create_user(
+            email='author@example.com',
+            username='author',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='Pa$$w0rd-author',
+        )
+        recipes = {
+            'in_name': ('Борщ', 'Свёкла и капуста'),
+            'in_text': ('Обед', 'Суп, который подают перед борщом'),
+            'other': ('Каша', 'Гречка'),
+        }
+        cls.recipes = {
+            key: Recipe.objects.create(
+                author=author, name=name, text=text, cooking_time=10,
+                image='recipes/images/recipe.png',
+            )
+            for key, (name, text) in recipes.items()
+        }
+
+    def search(self, query):
+        return list(search_recipes(
+            Recipe.objects.all(), query
+        ).values_list('id', flat=True))
+
+    def test_name_ranks_above_text(self):
+        self.assertEqual(self.search('борщ'), [
+            self.recipes['in_name'].id, self.recipes['in_text'].id
+        ])
+
+    def test_rename(self):
+        recipe = self.recipes['other']
+        recipe.name = 'Гречневая каша с грибами'
+        recipe.save()
+        self.assertEqual(self.search('грибами'), [recipe.id])
+
+    @skipUnless(connection.vendor == 'sqlite', 'Триггеры FTS5 есть на SQLite.')
+    def test_triggers_recreated(self):
+        name = next(iter(SQLITE_TRIGGERS))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER {name}')
+        recipe = Recipe.objects.create(
+            author=self.recipes['other'].author, name='Окрошка',
+            text='Квас', cooking_time=10, image='recipes/images/recipe.png',
+        )
+        self.assertEqual(self.search('окрошка'), [])
+        create_search_triggers(using=connection.alias)
+        self.assertEqual(self.search('окрошка'), [recipe.id])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+            )
+            triggers = {row[0] for row in cursor.fetchall()}
+        self.assertLessEqual(set(SQLITE_TRIGGERS), triggers)
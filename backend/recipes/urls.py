@@ -1,6 +1,12 @@
+from django.conf import settings
 from django.urls import path
-from recipes.views import redirect_to_full_recipe
+from recipes.views import (redirect_to_full_recipe,
+                           redirect_to_full_recipe_async)
 
 urlpatterns = [
-    path('<str:short_url>', redirect_to_full_recipe),
+    path(
+        '<str:short_url>',
+        redirect_to_full_recipe_async if settings.ASYNC_READ_VIEWS
+        else redirect_to_full_recipe
+    ),
 ]
@@ -1,10 +1,52 @@
-from django.http import HttpResponseRedirect
-from django.shortcuts import get_object_or_404
-from recipes.models import Recipe
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import Http404, HttpResponseRedirect
+
+from foodgram.async_db import database_sync_to_async
+from recipes.models import SHORT_URL_MAX_LENGTH, Recipe
+from recipes.short_links import decode_short_url
+
+MISSING_RECIPE = 0
+
+
+def find_recipe_id(short_url):
+    """Поиск id рецепта по прежнему короткому коду с кэшированием."""
+    # Коды состоят из латинских букв и цифр; другие строки не годятся
+    # и в качестве ключа memcached.
+    if not (
+        short_url.isascii() and short_url.isalnum()
+        and len(short_url) <= SHORT_URL_MAX_LENGTH
+    ):
+        return MISSING_RECIPE
+    key = f'short_url:{short_url}'
+    recipe_id = cache.get(key)
+    if recipe_id is None:
+        recipe_id = Recipe.objects.filter(
+            Q(short_url=short_url) | Q(legacy_short_url=short_url)
+        ).values_list('id', flat=True).first() or MISSING_RECIPE
+        cache.set(key, recipe_id, settings.SHORT_URL_CACHE_TIMEOUT)
+    return recipe_id
 
 
 def redirect_to_full_recipe(request, short_url):
     """Перенаправление к полному рецепту."""
-    recipe = get_object_or_404(Recipe, short_url=short_url)
-    full_url = f'/recipes/{recipe.id}'
+    recipe_id = decode_short_url(short_url) or find_recipe_id(short_url)
+    if recipe_id == MISSING_RECIPE:
+        raise Http404
+    full_url = f'/recipes/{recipe_id}'
     return HttpResponseRedirect(full_url)
+
+
+async def redirect_to_full_recipe_async(request, short_url):
+    """Перенаправление к полному рецепту без блокировки процесса.
+
+    Новые коды раскодируются без обращения к базе данных; прежние
+    ищутся в кэше и базе данных в пуле потоков.
+    """
+    recipe_id = decode_short_url(short_url) or await database_sync_to_async(
+        find_recipe_id
+    )(short_url)
+    if recipe_id == MISSING_RECIPE:
+        raise Http404
+    return HttpResponseRedirect(f'/recipes/{recipe_id}')
@@ -3,6 +3,8 @@ from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.db import models
 from django.db.models import CheckConstraint, UniqueConstraint
 
+from recipes.counters import CountersMixin
+
 NAME_MAX_LENGTH = 150
 EMAIL_MAX_LENGTH = 254
 
@@ -10,9 +12,11 @@ EMAIL_MAX_LENGTH = 254
 DEFAULT_AVATAR = 'users/avatar_default.jpg'
 
 
-class FoodgramUser(AbstractUser):
+class FoodgramUser(CountersMixin, AbstractUser):
     """Модель пользователя."""
 
+    counter_fields = ('recipes_count', 'followers_count')
+
     username = models.CharField(
         'Никнейм',
         max_length=NAME_MAX_LENGTH,
@@ -37,6 +41,12 @@ class FoodgramUser(AbstractUser):
         null=True,
         default=DEFAULT_AVATAR
     )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов', default=0, editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков', default=0, editable=False
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import forget_tokens, forget_user_tokens
+from recipes.counters import change_counter
+from recipes.detail_cache import (
+    author_recipe_ids,
+    forget_author_recipe_details,
+    forget_recipe_details,
+)
+from recipes.feed import backfill_feeds
+from recipes.image_variants import schedule_variants
+from users.models import Follow, FoodgramUser
+
+# Поля пользователя, показываемые в блоке автора рецепта; число
+# подписчиков сбрасывается обработчиками подписок.
+AUTHOR_FIELDS = frozenset(
+    ('email', 'username', 'first_name', 'last_name', 'avatar')
+)
+LOGIN_FIELDS = frozenset(('last_login',))
+
+
+@receiver(post_save, sender=Follow)
+def increase_followers_count(instance, created, **kwargs):
+    """Увеличение количества подписчиков автора."""
+    if created:
+        change_counter(
+            FoodgramUser.objects.filter(pk=instance.author_id),
+            'followers_count', 1
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def decrease_followers_count(instance, **kwargs):
+    """Уменьшение количества подписчиков автора.
+
+    Если автор опустился до порога раскладки по лентам, его рецепты
+    дописываются в ленты подписчиков. Строка автора блокируется,
+    чтобы переход через порог заметила ровно одна отписка.
+    """
+    author_id = instance.author_id
+    author = FoodgramUser.objects.filter(pk=author_id)
+    with transaction.atomic():
+        followers = author.select_for_update().values_list(
+            'followers_count', flat=True
+        ).first()
+        change_counter(author, 'followers_count', -1)
+    if followers == settings.FEED_FANOUT_MAX_FOLLOWERS + 1:
+        transaction.on_commit(lambda: backfill_feeds(author_id))
+
+
+@receiver(post_save, sender=FoodgramUser)
+def create_avatar_variants(instance, update_fields, **kwargs):
+    """Создание уменьшенных копий аватара."""
+    if update_fields is None or 'avatar' in update_fields:
+        name = instance.avatar.name if instance.avatar else None
+        author_id = instance.pk
+        transaction.on_commit(
+            lambda: schedule_avatar_variants(name, author_id)
+        )
+
+
+def schedule_avatar_variants(name, author_id):
+    """Создание копий аватара со сбросом кэша рецептов автора.
+
+    Рецепты автора читаются сразу: обработчик завершения работает
+    в служебном потоке пула, где соединение с базой не закрывается.
+    """
+    pks = author_recipe_ids(author_id) if name else ()
+    schedule_variants(name, lambda: forget_recipe_details(pks))
+
+
+@receiver(post_save, sender=FoodgramUser)
+def forget_cached_user(instance, created, update_fields, **kwargs):
+    """Удаление из кэша авторизации устаревшего пользователя.
+
+    Время последнего входа кэш не затрагивает.
+    """
+    if created or (update_fields and update_fields <= LOGIN_FIELDS):
+        return
+    forget_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def forget_cached_token(instance, **kwargs):
+    """Удаление из кэша авторизации удалённого токена."""
+    forget_tokens((instance.key,))
+
+
+@receiver(post_save, sender=FoodgramUser)
+def forget_author_recipes(instance, created, update_fields, **kwargs):
+    """Сброс кэша рецептов автора после изменения полей блока автора."""
+    if created or (update_fields and not update_fields & AUTHOR_FIELDS):
+        return
+    forget_author_recipe_details(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def forget_followed_author_recipes(instance, **kwargs):
+    """Сброс кэша рецептов автора после смены числа подписчиков."""
+    forget_author_recipe_details(instance.author_id)